@@ -0,0 +1,271 @@
+"""Local stand-ins for Discord, YouTube and Spotify used by the benchmarks."""
+
+import asyncio
+import io
+import math
+import struct
+import threading
+import time
+import urllib.request
+import wave
+from urllib.parse import parse_qs, urlparse
+
+import discord
+from aiohttp import web
+
+FRAME_SIZE = 3840  # Bytes of 16-bit 48 kHz stereo PCM per 20 ms frame
+WAV_HEADER_SIZE = 44
+
+def make_wav(seconds):
+    """Returns a 48 kHz stereo WAV file of a 440 Hz tone."""
+    samples = int(48000 * seconds)
+    tone = [int(8000 * math.sin(2 * math.pi * 440 * i / 48000)) for i in range(480)]
+    frames = b"".join(struct.pack("<hh", tone[i % 480], tone[i % 480]) for i in range(samples))
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(48000)
+        wav.writeframes(frames)
+    return buffer.getvalue()
+
+class AudioServer:
+    """Serves the same WAV file at `/audio/<name>` from its own thread and event loop."""
+
+    def __init__(self, seconds):
+        self.audio = make_wav(seconds)
+        self.requests = 0
+        self.url = None
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name="audio-server", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def _serve(self):
+        asyncio.set_event_loop(self._loop)
+
+        async def handle_audio(request):
+            self.requests += 1
+            return web.Response(body=self.audio, content_type="audio/wav")
+
+        app = web.Application()
+        app.router.add_get("/audio/{name}", handle_audio)
+        runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        self._loop.run_until_complete(site.start())
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        self._started.set()
+        self._loop.run_forever()
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+class HttpAudioSource(discord.AudioSource):
+    """Streams PCM frames of a WAV file from the audio server. Used in place of FFmpeg when it is not installed."""
+
+    def __init__(self, url):
+        self.url = url
+        self._response = None
+
+    def read(self):
+        if self._response is None:
+            self._response = urllib.request.urlopen(self.url)
+            self._response.read(WAV_HEADER_SIZE)
+        frame = self._response.read(FRAME_SIZE)
+        return frame if len(frame) == FRAME_SIZE else b""
+
+    def is_opus(self):
+        return False
+
+    def cleanup(self):
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+
+class FakeYoutubeDL:
+    """Replaces `youtube_dl.YoutubeDL`, returning canned info after a simulated network delay."""
+
+    audio_url = None
+    delay = 0.02
+    duration = 1
+    calls = 0
+
+    def __init__(self, options=None):
+        self.options = options or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def extract_info(self, url, download=False):
+        FakeYoutubeDL.calls += 1
+        time.sleep(self.delay)
+        video_id = parse_qs(urlparse(url).query).get("v", ["unknown"])[0]
+        return {
+            'id': video_id,
+            'title': f"Video {video_id}",
+            'webpage_url': url,
+            'url': f"{self.audio_url}/audio/{video_id}.wav",
+            'duration': self.duration,
+            'formats': [{'format_id': '251', 'acodec': 'opus', 'url': f"{self.audio_url}/audio/{video_id}.wav"}],
+        }
+
+class FakeSpotify:
+    """Replaces the spotipy client behind `SpotifyGateway`."""
+
+    def __init__(self, audio_url, duration, delay=0.02):
+        self.audio_url = audio_url
+        self.duration = duration
+        self.delay = delay
+        self.calls = 0
+
+    def _track(self, track_id):
+        return {
+            'id': track_id,
+            'name': f"Track {track_id}",
+            'artists': [{'name': "Benchmark"}],
+            'preview_url': f"{self.audio_url}/audio/{track_id}.wav",
+            'duration_ms': self.duration * 1000,
+            'external_urls': {'spotify': f"https://open.spotify.com/track/{track_id}"},
+        }
+
+    def track(self, track_id):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self._track(track_id)
+
+    def tracks(self, track_ids):
+        self.calls += 1
+        time.sleep(self.delay)
+        return {'tracks': [self._track(track_id) for track_id in track_ids]}
+
+    def search(self, q, type="track", limit=5):
+        self.calls += 1
+        time.sleep(self.delay)
+        return {'tracks': {'items': [self._track(f"search{i:016d}") for i in range(limit)]}}
+
+class FakeVoiceClient:
+    """Plays sources like `discord.VoiceClient`, reading one frame per 20 ms (divided by `speed`) on a thread."""
+
+    def __init__(self, channel, speed):
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.speed = speed
+        self.source = None
+        self.frames_played = 0
+        self._connected = True
+        self._paused = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def is_connected(self):
+        return self._connected
+
+    def is_playing(self):
+        return self._thread is not None and self._thread.is_alive() and not self._paused.is_set()
+
+    def is_paused(self):
+        return self._paused.is_set()
+
+    def play(self, source, after=None):
+        self.source = source
+        self._stopped = threading.Event()
+        self._paused.clear()
+        self._thread = threading.Thread(target=self._play, args=(source, after, self._stopped), daemon=True)
+        self._thread.start()
+
+    def _play(self, source, after, stopped):
+        error = None
+        try:
+            while not stopped.is_set():
+                if self._paused.is_set():
+                    time.sleep(0.02)
+                    continue
+                if not self.source.read():
+                    break
+                self.frames_played += 1
+                time.sleep(0.02 / self.speed)
+        except Exception as e:
+            error = e
+        finally:
+            source.cleanup()
+        if after is not None:
+            after(error)
+
+    def pause(self):
+        self._paused.set()
+
+    def resume(self):
+        self._paused.clear()
+
+    def stop(self):
+        self._stopped.set()
+
+    async def disconnect(self, force=False):
+        self.stop()
+        self._connected = False
+        if self in self.channel.bot.voice_clients:
+            self.channel.bot.voice_clients.remove(self)
+
+class FakeMember:
+    def __init__(self, member_id, channel=None, bot=False):
+        self.id = member_id
+        self.name = f"user{member_id}"
+        self.discriminator = "0"
+        self.bot = bot
+        self.voice = type("VoiceState", (), {"channel": channel})() if channel is not None else None
+
+class FakeVoiceChannel:
+    def __init__(self, bot, guild, speed):
+        self.bot = bot
+        self.guild = guild
+        self.id = guild.id + 1
+        self.speed = speed
+        self.members = []
+
+    async def connect(self):
+        voice_client = FakeVoiceClient(self, self.speed)
+        self.bot.voice_clients.append(voice_client)
+        return voice_client
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.name = f"Guild {guild_id}"
+        self.shard_id = 0
+
+class FakeContext:
+    """The parts of `commands.Context` the cogs use; replies are recorded instead of sent."""
+
+    def __init__(self, bot, guild, author):
+        self.bot = bot
+        self.guild = guild
+        self.author = author
+        self.replies = []
+
+    async def send(self, content=None, *, embed=None, **kwargs):
+        self.replies.append(embed.title if embed is not None else content)
+
+class FakeBot:
+    """The parts of `commands.Bot` the music cog uses."""
+
+    def __init__(self):
+        self.shard_count = None
+        self.voice_clients = []
+        self.guilds = []
+        self.cogs = {}
+        self._ready = asyncio.Event()  # Never set, so background loops waiting for readiness stay idle
+
+    def get_cog(self, name):
+        return self.cogs.get(name)
+
+    async def wait_until_ready(self):
+        await self._ready.wait()
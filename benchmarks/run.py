@@ -0,0 +1,264 @@
+"""Benchmarks the music commands and playback pipeline against local stand-ins.
+
+Usage:
+    python -m benchmarks.run [--guilds 1 100 1000] [--compare benchmarks/results/<previous>.json]
+
+Each scenario drives `MusicCog` commands for N simulated guilds at once,
+then lets every queue play out, and reports command throughput, track
+transition latency, memory per guild and event loop lag. Results are saved
+as JSON so later runs can be compared for regressions.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+# Settings read at import time by the config modules
+os.environ.setdefault("SPOTIFY_CLIENT_ID", "benchmark")
+os.environ.setdefault("SPOTIFY_CLIENT_SECRET", "benchmark")
+os.environ["SESSION_STORE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="benchmark-"), "sessions.db")
+os.environ.pop("RESOLVE_CACHE_PATH", None)
+os.environ.pop("AUDIO_CACHE_PATH", None)
+os.environ["VOICE_WORKERS"] = "0"
+
+import utils.extractor as extractor_module
+from benchmarks.fakes import (AudioServer, FakeBot, FakeContext, FakeGuild, FakeMember, FakeSpotify,
+                              FakeVoiceChannel, FakeYoutubeDL, HttpAudioSource)
+from cogs.music import MusicCog
+from config import music
+from utils import metrics
+from utils.music_player import MusicPlayer
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Compared between runs: (path in a scenario's results, True if higher is better)
+COMPARED = [
+    (("commands_per_second",), True),
+    (("command_latency_ms", "p95"), False),
+    (("transition_latency_ms", "p95"), False),
+    (("memory_per_guild_kb",), False),
+    (("loop_lag_ms", "p95"), False),
+]
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def rss_bytes():
+    """Returns the resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+async def sample_loop_lag(samples, interval=0.01):
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - started - interval)
+
+async def run_scenario(guild_count, args, audio_url):
+    bot = FakeBot()
+    cog = MusicCog(bot)
+    cog.spotify.client = FakeSpotify(audio_url, args.track_seconds, delay=args.api_delay)
+    bot.cogs["MusicCog"] = cog
+
+    gaps = []
+    observe_gap = metrics.TRANSITION_GAP.observe
+    metrics.TRANSITION_GAP.observe = lambda value, **labels: (gaps.append(value), observe_gap(value, **labels))
+
+    contexts = []
+    for i in range(guild_count):
+        guild = FakeGuild((i + 1) << 22)
+        channel = FakeVoiceChannel(bot, guild, args.speed)
+        author = FakeMember(i + 1, channel)
+        channel.members.append(author)
+        bot.guilds.append(guild)
+        contexts.append(FakeContext(bot, guild, author))
+
+    youtube = [f"https://www.youtube.com/watch?v=video{i}" for i in range(args.catalog)]
+    spotify = [f"https://open.spotify.com/track/track{i:017d}" for i in range(args.catalog)]
+    latencies = []
+
+    async def run_command(command, ctx, **kwargs):
+        started = time.perf_counter()
+        await command.callback(cog, ctx, **kwargs)
+        latencies.append(time.perf_counter() - started)
+
+    async def drive(ctx, rng):
+        for n in range(args.songs):
+            url = rng.choice(spotify if n % 4 == 3 else youtube)
+            await run_command(cog.play, ctx, query=url)
+        await run_command(cog.queue, ctx, page=1)
+
+    lag = []
+    lag_sampler = asyncio.create_task(sample_loop_lag(lag))
+    extractions_before = FakeYoutubeDL.calls
+    prebuffered_before = metrics.PREBUFFERED_STARTS.get()
+    gc.collect()
+    rss_before = rss_bytes()
+
+    # Commands: every guild queues its songs at the same time
+    started = time.perf_counter()
+    await asyncio.gather(*(drive(ctx, random.Random(i)) for i, ctx in enumerate(contexts)))
+    command_seconds = time.perf_counter() - started
+
+    gc.collect()
+    rss_after = rss_bytes()
+
+    # Playback: wait for every queue to play out
+    deadline = time.monotonic() + args.playback_timeout
+    players = list(cog.music_players.values())
+    while time.monotonic() < deadline and any(p.is_playing or p._loading is not None or p.queue for p in players):
+        await asyncio.sleep(0.05)
+    drained = not any(p.is_playing or p._loading is not None or p.queue for p in players)
+
+    lag_sampler.cancel()
+    metrics.TRANSITION_GAP.observe = observe_gap
+    for player in players:
+        await player.close()
+    cog.cog_unload()
+
+    replies = [reply for ctx in contexts for reply in ctx.replies]
+    commands_run = len(latencies)
+    return {
+        "guilds": guild_count,
+        "commands": commands_run,
+        "commands_per_second": round(commands_run / command_seconds, 1),
+        "command_latency_ms": {"p50": round(percentile(latencies, 0.5) * 1000, 2), "p95": round(percentile(latencies, 0.95) * 1000, 2)},
+        "busy_replies": replies.count("Busy"),
+        "error_replies": replies.count("Error"),
+        "extractions": FakeYoutubeDL.calls - extractions_before,
+        "transitions": len(gaps),
+        "prebuffered_starts": metrics.PREBUFFERED_STARTS.get() - prebuffered_before,
+        "transition_latency_ms": {"mean": round(sum(gaps) / len(gaps) * 1000, 2) if gaps else 0.0, "p95": round(percentile(gaps, 0.95) * 1000, 2)},
+        "queues_drained": drained,
+        "memory_per_guild_kb": round(max(0, rss_after - rss_before) / guild_count / 1024, 1),
+        "loop_lag_ms": {
+            "p50": round(percentile(lag, 0.5) * 1000, 2),
+            "p95": round(percentile(lag, 0.95) * 1000, 2),
+            "max": round(max(lag, default=0) * 1000, 2),
+        },
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def lookup(result, path):
+    for key in path:
+        result = result.get(key) if isinstance(result, dict) else None
+    return result
+
+def compare(current, previous, tolerance):
+    """Prints the change of each compared metric and returns the regressions."""
+    regressions = []
+    print(f"\nCompared with {previous['meta'].get('commit')} ({previous['meta'].get('timestamp')}):")
+    for guilds, result in current["scenarios"].items():
+        before = previous["scenarios"].get(guilds)
+        if before is None:
+            continue
+        for path, higher_is_better in COMPARED:
+            new, old = lookup(result, path), lookup(before, path)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            regressed = (change < -tolerance) if higher_is_better else (change > tolerance)
+            name = ".".join(path)
+            print(f"  {guilds:>5} guilds  {name:<26} {old:>10} -> {new:<10} {change:+.1%}{'  REGRESSION' if regressed else ''}")
+            if regressed:
+                regressions.append((guilds, name))
+    return regressions
+
+def check(results):
+    """Prints and returns the scenarios whose playback pipeline misbehaved, whatever their timings."""
+    failures = []
+    for guilds, result in results["scenarios"].items():
+        if not result["queues_drained"]:
+            failures.append((guilds, "queues did not drain"))
+        if music.PREBUFFER_SECONDS > 0 and result["transitions"] and not result["prebuffered_starts"]:
+            failures.append((guilds, "no song started from its pre-buffered source"))
+    for guilds, failure in failures:
+        print(f"  {guilds:>5} guilds  CHECK FAILED: {failure}")
+    return failures
+
+async def main(args):
+    server = AudioServer(args.track_seconds).start()
+    FakeYoutubeDL.audio_url = server.url
+    FakeYoutubeDL.delay = args.api_delay
+    FakeYoutubeDL.duration = args.track_seconds
+    extractor_module.youtube_dl = SimpleNamespace(YoutubeDL=FakeYoutubeDL)
+
+    use_ffmpeg = shutil.which("ffmpeg") is not None and not args.no_ffmpeg
+    if not use_ffmpeg:
+        # Frames are read straight from the audio server instead of through an FFmpeg process
+        MusicPlayer._create_source = lambda self, track, offset=0: HttpAudioSource(track['stream_url'])
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "ffmpeg": use_ffmpeg,
+            "settings": {key: value for key, value in vars(args).items() if key not in ("compare", "output")},
+        },
+        "scenarios": {},
+    }
+    try:
+        for guild_count in args.guilds:
+            print(f"Running {guild_count} guilds...", flush=True)
+            result = await run_scenario(guild_count, args, server.url)
+            results["scenarios"][str(guild_count)] = result
+            print(json.dumps(result, indent=2))
+    finally:
+        server.stop()
+    return results
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--guilds", type=int, nargs="+", default=[1, 100, 1000], help="Simulated guild counts, one scenario each.")
+    parser.add_argument("--songs", type=int, default=4, help="Songs queued per guild.")
+    parser.add_argument("--catalog", type=int, default=200, help="Distinct YouTube and Spotify tracks songs are drawn from.")
+    parser.add_argument("--track-seconds", type=float, default=1, help="Length of every track.")
+    parser.add_argument("--speed", type=float, default=5, help="Playback speed-up of the fake voice clients.")
+    parser.add_argument("--api-delay", type=float, default=0.02, help="Simulated YouTube and Spotify response time, in seconds.")
+    parser.add_argument("--playback-timeout", type=float, default=120, help="Seconds to wait for queues to play out.")
+    parser.add_argument("--no-ffmpeg", action="store_true", help="Read audio directly even if FFmpeg is installed.")
+    parser.add_argument("--output", help="Where to save the results (default: benchmarks/results/<timestamp>.json).")
+    parser.add_argument("--compare", help="Previous results file to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Relative change reported as a regression.")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"\nSaved results to {output}")
+
+    failed = check(results)
+    if args.compare:
+        with open(args.compare) as file:
+            failed = compare(results, json.load(file), args.tolerance) or failed
+    if failed:
+        sys.exit(1)
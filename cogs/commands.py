@@ -2,23 +2,41 @@ import discord
 from discord.ext import commands
 
 from utils.helpers import create_embed
+from utils.lookup import MemberLookup
+from utils.shards import shard_health
+from utils.views import HelpPages, HelpView
 
 class CommandsCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.help_pages = HelpPages(bot)  # Rebuilt only when the set of commands changes
 
     @commands.command(name="ping", help="Checks the bot's latency.")
     async def ping(self, ctx):
-        """Checks the bot's latency."""
-        await ctx.send(embed=create_embed(title="Pong!", description=f"Latency: {round(self.bot.latency * 1000)}ms"))
+        """Checks the bot's latency, per shard."""
+        music_cog = self.bot.get_cog("MusicCog")
+        current_shard = ctx.guild.shard_id if ctx.guild else 0
+
+        lines = []
+        for shard_id, latency, guilds, healthy in shard_health(self.bot):
+            players = len(music_cog.music_players.shard(shard_id)) if music_cog else 0
+            status = f"{latency}ms" if healthy else "disconnected"
+            marker = " (this server)" if shard_id == current_shard else ""
+            lines.append(f"**Shard {shard_id}**{marker}: {status}, {guilds} servers, {players} players")
+
+        embed = create_embed(title="Pong!", description=f"Latency: {round(self.bot.latency * 1000)}ms\n" + "\n".join(lines))
+        await ctx.send(embed=embed)
+
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload):
+        lookup = getattr(self.bot, "lookup", None)
+        if lookup is not None:
+            lookup.forget(payload.guild_id, payload.user.id)
 
     @commands.command(name="help", help="Displays the bot's available commands.")
     async def help(self, ctx):
         """Displays the bot's available commands."""
-        embed = create_embed(title="Help", description="Here are the available commands:")
-        for command in self.bot.commands:
-            embed.add_field(name=f"!{command.name}", value=command.help, inline=False)
-        await ctx.send(embed=embed)
+        await HelpView(ctx.author, self.help_pages).send(ctx)
 
     @commands.command(name="serverinfo", help="Displays information about the current server.")
     async def serverinfo(self, ctx):
@@ -28,7 +46,7 @@ class CommandsCog(commands.Cog):
         await ctx.send(embed=embed)
 
     @commands.command(name="userinfo", help="Displays information about a specified user.")
-    async def userinfo(self, ctx, user: discord.Member = None):
+    async def userinfo(self, ctx, user: MemberLookup = None):
         """Displays information about a specified user."""
         if user is None:
             user = ctx.author
@@ -37,7 +55,7 @@ class CommandsCog(commands.Cog):
 
     @commands.command(name="kick", help="Kicks a user from the server (requires appropriate permissions).")
     @commands.has_permissions(kick_members=True)
-    async def kick(self, ctx, member: discord.Member, *, reason=None):
+    async def kick(self, ctx, member: MemberLookup, *, reason=None):
         """Kicks a user from the server (requires appropriate permissions)."""
         try:
             await member.kick(reason=reason)
@@ -47,7 +65,7 @@ class CommandsCog(commands.Cog):
 
     @commands.command(name="ban", help="Bans a user from the server (requires appropriate permissions).")
     @commands.has_permissions(ban_members=True)
-    async def ban(self, ctx, member: discord.Member, *, reason=None):
+    async def ban(self, ctx, member: MemberLookup, *, reason=None):
         """Bans a user from the server (requires appropriate permissions)."""
         try:
             await member.ban(reason=reason)
@@ -57,7 +75,7 @@ class CommandsCog(commands.Cog):
 
     @commands.command(name="mute", help="Mutes a user in the server (requires appropriate permissions).")
     @commands.has_permissions(manage_channels=True)
-    async def mute(self, ctx, member: discord.Member, *, reason=None):
+    async def mute(self, ctx, member: MemberLookup, *, reason=None):
         """Mutes a user in the server (requires appropriate permissions)."""
         try:
             await member.edit(mute=True, reason=reason)
@@ -67,7 +85,7 @@ class CommandsCog(commands.Cog):
 
     @commands.command(name="unmute", help="Unmutes a user in the server (requires appropriate permissions).")
     @commands.has_permissions(manage_channels=True)
-    async def unmute(self, ctx, member: discord.Member, *, reason=None):
+    async def unmute(self, ctx, member: MemberLookup, *, reason=None):
         """Unmutes a user in the server (requires appropriate permissions)."""
         try:
             await member.edit(mute=False, reason=reason)
@@ -75,5 +93,5 @@ class CommandsCog(commands.Cog):
         except discord.Forbidden:
             await ctx.send(embed=create_embed(title="Error", description="I do not have permission to unmute members."))
 
-def setup(bot):
-    bot.add_cog(CommandsCog(bot))
\ No newline at end of file
+async def setup(bot):
+    await bot.add_cog(CommandsCog(bot))
\ No newline at end of file
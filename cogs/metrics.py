@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import time
+
+from discord.ext import commands
+
+from config import bot as bot_config
+from utils import metrics
+from utils.helpers import create_embed
+
+_log = logging.getLogger(__name__)
+
+class MetricsCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self._lag_monitor = None
+        self._server = None
+
+        # Gauges read from the other cogs whenever metrics are collected
+        metrics.VOICE_CONNECTIONS.set_function(lambda: {(): len(self.bot.voice_clients)})
+        metrics.QUEUE_DEPTH.set_function(lambda: {(guild_id,): len(player.queue) for guild_id, player in self._players()})
+        metrics.LAST_TRANSITION_GAP.set_function(lambda: {
+            (guild_id,): player.last_transition_gap for guild_id, player in self._players() if player.last_transition_gap is not None
+        })
+        metrics.EXTRACTOR_PENDING.set_function(lambda: {(): self._music_cog.extractor.pending} if self._music_cog else {})
+        metrics.CACHE_HIT_RATIO.set_function(self._cache_hit_ratios)
+
+    @property
+    def _music_cog(self):
+        return self.bot.get_cog("MusicCog")
+
+    def _players(self):
+        return list(self._music_cog.music_players.items()) if self._music_cog else []
+
+    def _cache_hit_ratios(self):
+        ratios = {}
+        if self._music_cog:
+            ratios[("resolver",)] = self._music_cog.resolver.cache.memory.hit_ratio
+            if self._music_cog.audio_cache is not None:
+                ratios[("audio",)] = self._music_cog.audio_cache.hit_ratio
+        if getattr(self.bot, "lookup", None) is not None:
+            ratios[("members",)] = self.bot.lookup._members.hit_ratio
+        return ratios
+
+    async def cog_load(self):
+        self._lag_monitor = asyncio.create_task(metrics.monitor_loop_lag(bot_config.LOOP_LAG_INTERVAL))
+
+    async def cog_unload(self):
+        if self._lag_monitor is not None:
+            self._lag_monitor.cancel()
+        if self._server is not None:
+            await self._server.cleanup()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Started once connected rather than when loaded, so a warm standby on the same host does not take the port
+        if bot_config.METRICS_PORT and self._server is None:
+            try:
+                self._server = await metrics.start_server(bot_config.METRICS_HOST, bot_config.METRICS_PORT)
+            except OSError as e:
+                print(f"Error starting the metrics server: {e}")
+
+    @commands.Cog.listener()
+    async def on_command(self, ctx):
+        ctx.started_at = time.perf_counter()
+
+    @commands.Cog.listener()
+    async def on_command_completion(self, ctx):
+        self._observe(ctx)
+
+    @commands.Cog.listener()
+    async def on_command_error(self, ctx, error):
+        if ctx.command is not None:
+            metrics.COMMAND_ERRORS.inc(command=ctx.command.qualified_name)
+            self._observe(ctx)
+
+        # Registering this listener turns off the bot's default handler, so its logging is done here
+        if (ctx.command is not None and ctx.command.has_error_handler()) or (ctx.cog is not None and ctx.cog.has_error_handler()):
+            return
+        _log.error("Ignoring exception in command %s", ctx.command, exc_info=error)
+
+    def _observe(self, ctx):
+        started_at = getattr(ctx, "started_at", None)
+        if started_at is not None and ctx.command is not None:
+            metrics.COMMAND_LATENCY.observe(time.perf_counter() - started_at, command=ctx.command.qualified_name)
+
+    @commands.command(name="stats", help="Displays performance statistics (administrators only).")
+    @commands.has_permissions(administrator=True)
+    async def stats(self, ctx):
+        """Displays performance statistics (administrators only)."""
+        try:
+            latency = metrics.COMMAND_LATENCY
+            commands_by_use = sorted(latency.label_values(), key=lambda key: latency.count(command=key[0]), reverse=True)[:10]
+            command_lines = [
+                f"`!{name}`: {latency.count(command=name)} runs, {latency.mean(command=name) * 1000:.0f}ms mean, "
+                f"p95 ≤ {latency.quantile(0.95, command=name) * 1000:.0f}ms, {metrics.COMMAND_ERRORS.get(command=name)} errors"
+                for (name,) in commands_by_use
+            ]
+
+            players = self._players()
+            extraction, gap, lag = metrics.EXTRACTION_SECONDS, metrics.TRANSITION_GAP, metrics.LOOP_LAG
+            fields = [
+                {"name": "Commands", "value": "\n".join(command_lines) or "No commands run yet."},
+                {"name": "Event Loop", "value": f"Lag: {metrics.LAST_LOOP_LAG.get() * 1000:.1f}ms now, p95 ≤ {lag.quantile(0.95) * 1000:.0f}ms", "inline": True},
+                {"name": "Voice", "value": f"{metrics.VOICE_CONNECTIONS.get()} connections, {len(players)} players, "
+                                           f"{sum(len(player.queue) for _, player in players)} songs queued", "inline": True},
+                {"name": "Extraction", "value": f"{extraction.count()} runs, {extraction.mean():.2f}s mean, "
+                                                f"{metrics.EXTRACTOR_PENDING.get()} waiting", "inline": True},
+                {"name": "Track Transitions", "value": f"{gap.mean() * 1000:.0f}ms mean gap, p95 ≤ {gap.quantile(0.95) * 1000:.0f}ms", "inline": True},
+                {"name": "Cache Hit Ratios", "value": "\n".join(
+                    f"{name}: {ratio:.0%}" for (name,), ratio in self._cache_hit_ratios().items()
+                ) or "No caches in use."},
+            ]
+            await ctx.send(embed=create_embed(title="Stats", description="Performance since the bot started.", fields=fields))
+
+        except Exception as e:
+            print(f"Error in stats command: {e}")
+            await ctx.send(embed=create_embed(title="Error", description="An error occurred while collecting the stats."))
+
+async def setup(bot):
+    await bot.add_cog(MetricsCog(bot))
@@ -1,54 +1,267 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import asyncio
-import youtube_dl
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
-import pydub
-from pydub import AudioSegment
+import time
 from utils.music_player import MusicPlayer
-from utils.helpers import create_embed
-from config import secrets
-
-# Suppress noisy yt-dlp logging
-youtube_dl.utils.bug_reports_message = lambda: ''
+from utils.ratelimit import RateLimited, create_rate_limiter, rate_limited
+from utils.audio_cache import AudioCache
+from utils.checkpoints import Checkpointer
+from utils.voice_workers import VoiceWorkerPool
+from utils.extractor import Extractor, ExtractorBusy
+from utils.resolver import TrackResolver, playlist_id
+from utils.search import YouTubeSearch
+from utils.session_store import SessionStore
+from utils.singleflight import SingleFlight
+from utils.shards import ShardedRegistry, shard_id_for
+from utils.spotify import SpotifyGateway
+from utils.helpers import create_embed, format_duration
+from utils.views import QueueView
+from config import bot as bot_config, music
 
 class MusicCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.music_players = {}  # Store music players per guild
+        self.music_players = ShardedRegistry(bot)  # Store music players per guild, partitioned by shard
+        self.extractor = Extractor()  # Shared youtube_dl worker pool
+
+        # Shared Spotify API client
+        self.spotify = SpotifyGateway()
+
+        # Cached URL -> stream resolution shared by every guild's player
+        self.resolver = TrackResolver(self.extractor, self.spotify)
+        self._background_tasks = set()  # Strong references to fire-and-forget resolution tasks
+
+        # Cached YouTube text search
+        self.youtube_search = YouTubeSearch(self.extractor)
+
+        # Throttling of the commands that trigger lookups, and collapsing of repeated identical requests
+        self.rate_limiter = create_rate_limiter()
+        self._requests = SingleFlight()
+
+        # Optional on-disk Opus copies of frequently played tracks
+        self.audio_cache = None
+        if music.AUDIO_CACHE_PATH:
+            self.audio_cache = AudioCache(music.AUDIO_CACHE_PATH, music.AUDIO_CACHE_MAX_BYTES, music.AUDIO_CACHE_ADMIT_AFTER)
+
+        # Optional worker processes that decode and encode every guild's audio off this process
+        self.voice_workers = VoiceWorkerPool(music.VOICE_WORKERS) if music.VOICE_WORKERS > 0 else None
+
+        # Queue snapshots of evicted players, restored on the guild's next !play
+        self.sessions = SessionStore(music.SESSION_STORE_PATH)
+        self.reap_idle_players.start()
+
+        # Periodic checkpoints of active players, resumed when the bot restarts
+        self.checkpointer = Checkpointer(self.sessions)
+        self._restore_task = None
+        if music.CHECKPOINT_INTERVAL > 0:
+            self.checkpoint_players.start()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Loaded once connected, so a warm standby sharing the directory leaves the active process's files alone
+        if self.audio_cache is not None and not self.audio_cache.loaded:
+            self.audio_cache.load()
+
+    def cog_unload(self):
+        self.reap_idle_players.cancel()
+        self.checkpoint_players.cancel()
+        if self._restore_task is not None:
+            self._restore_task.cancel()
+        self.extractor.shutdown()
+        self.resolver.close()
+        self.sessions.close()
+        if self.audio_cache is not None:
+            self.audio_cache.close()
+        if self.voice_workers is not None:
+            self.voice_workers.close()
+
+    @tasks.loop(seconds=music.REAPER_INTERVAL)
+    async def reap_idle_players(self):
+        """Evicts players that are idle or alone in their voice channel."""
+        now = time.monotonic()
+        for guild_id, music_player in list(self.music_players.items()):
+            try:
+                if music_player.listener_count() == 0:
+                    if music_player.empty_since is None:
+                        music_player.empty_since = now
+                else:
+                    music_player.empty_since = None
+
+                empty = music_player.empty_since is not None and now - music_player.empty_since >= music.EMPTY_CHANNEL_TIMEOUT
+                if empty or music_player.idle_seconds() >= music.IDLE_TIMEOUT:
+                    await self.evict_player(guild_id)
+
+            except Exception as e:
+                print(f"Error reaping music player for guild {guild_id}: {e}")
 
-        # Spotify API client
-        self.spotify_client_credentials_manager = SpotifyClientCredentials(
-            client_id=secrets.SPOTIFY_CLIENT_ID,
-            client_secret=secrets.SPOTIFY_CLIENT_SECRET
-        )
-        self.spotify = spotipy.Spotify(client_credentials_manager=self.spotify_client_credentials_manager)
+    @reap_idle_players.before_loop
+    async def before_reap_idle_players(self):
+        await self.bot.wait_until_ready()
 
-    @commands.command(name="play", help="Plays a song from YouTube or Spotify.")
+    @tasks.loop(seconds=music.CHECKPOINT_INTERVAL)
+    async def checkpoint_players(self):
+        """Writes the changes to every active player since the last checkpoint."""
+        try:
+            await self.checkpointer.flush(self.music_players)
+        except Exception as e:
+            print(f"Error checkpointing music players: {e}")
+
+    @checkpoint_players.before_loop
+    async def before_checkpoint_players(self):
+        await self.bot.wait_until_ready()
+        self._restore_task = asyncio.create_task(self.restore_checkpoints())
+
+    async def restore_checkpoints(self):
+        """Resumes the players checkpointed before the bot restarted.
+
+        Players whose voice channel still has listeners rejoin it one at a
+        time, `CHECKPOINT_RESTORE_STAGGER` seconds apart, and pick up their
+        song where it was interrupted; each only resolves its songs as it
+        plays them. The other checkpoints become saved sessions, restored on
+        the guild's next !play.
+        """
+        try:
+            checkpoints = await self.sessions.load_checkpoints()
+        except Exception as e:
+            print(f"Error loading music player checkpoints: {e}")
+            return
+
+        dropped = []
+        for guild_id, channel_id, songs, position, volume in checkpoints:
+            try:
+                guild = self.bot.get_guild(guild_id)
+                if guild is None:
+                    # Left alone if another process runs the guild's shard
+                    if self.bot.shard_count is None or shard_id_for(guild_id, self.bot.shard_count) in self.bot.shards:
+                        dropped.append(guild_id)
+                    continue
+                if guild_id in self.music_players:
+                    continue  # Already playing again; its next checkpoint replaces this one
+
+                channel = guild.get_channel(channel_id)
+                if channel is None or not any(not member.bot for member in channel.members):
+                    await self.sessions.save(guild_id, songs)
+                    dropped.append(guild_id)
+                    continue
+
+                music_player = self.music_players[guild_id] = MusicPlayer(channel, self.resolver, self.audio_cache, self.voice_workers)
+                self.checkpointer.adopt(guild_id)
+                await music_player.set_volume(volume)
+                await music_player.resume_session(songs, position)
+                await asyncio.sleep(music.CHECKPOINT_RESTORE_STAGGER)
+
+            except Exception as e:
+                print(f"Error restoring music player for guild {guild_id}: {e}")
+
+        if dropped:
+            await self.sessions.save_checkpoints([], [], dropped)
+
+    async def evict_player(self, guild_id):
+        """Disconnects a guild's player and frees it, keeping a snapshot of its queue."""
+        music_player = self.music_players.pop(guild_id, None)
+        if music_player is None:
+            return
+
+        songs = music_player.snapshot()
+        if songs:
+            await self.sessions.save(guild_id, songs)
+        await music_player.close()
+        if self.voice_workers is not None:
+            self.voice_workers.release(guild_id)
+
+    async def get_player(self, ctx, voice_channel):
+        """Returns the guild's music player, creating it (and restoring its saved queue) if needed."""
+        if ctx.guild.id not in self.music_players:
+            music_player = self.music_players[ctx.guild.id] = MusicPlayer(voice_channel, self.resolver, self.audio_cache, self.voice_workers)
+
+            # Restore the queue saved when this guild's previous player was evicted
+            restored = await self.sessions.pop(ctx.guild.id)
+            if restored:
+                await music_player.add_songs(restored)
+                await ctx.send(embed=create_embed(title="Session Restored", description=f"{len(restored)} songs restored from your previous session."))
+        return self.music_players[ctx.guild.id]
+
+    async def _import_playlist(self, ctx, music_player, url):
+        """Enqueues a playlist or album page by page; playback starts with the first page."""
+        added = 0
+        youtube_budget = music.IMPORT_RESOLVE_COUNT
+        async for tracks in self.resolver.iter_playlist(ctx.guild.id, url):
+            await music_player.add_songs(tracks)
+            added += len(tracks)
+
+            # Spotify entries were resolved by the listing itself. YouTube stream URLs expire,
+            # so only the first entries are resolved now and the rest are prefetched later.
+            youtube_urls = [track.url for track in tracks if "spotify.com" not in track.url][:youtube_budget]
+            if youtube_urls:
+                youtube_budget -= len(youtube_urls)
+                task = asyncio.create_task(self.resolver.resolve_many(ctx.guild.id, youtube_urls))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+
+        if added == 0:
+            await ctx.send(embed=create_embed(title="Error", description="This playlist is empty."))
+            return
+        await ctx.send(embed=create_embed(title="Added to Queue", description=f"{added} songs added to the queue."))
+
+    async def cog_command_error(self, ctx, error):
+        try:
+            if isinstance(error, RateLimited):
+                await ctx.send(embed=create_embed(title="Slow Down", description=f"Too many requests. Please try again in {error.retry_after:.1f} seconds."))
+            elif isinstance(error, commands.UserInputError):
+                # A missing or malformed argument, e.g. `!volume abc` or `!play` without a query
+                usage = f"{bot_config.COMMAND_PREFIX}{ctx.command.qualified_name} {ctx.command.signature}".strip()
+                await ctx.send(embed=create_embed(title="Error", description=f"{error}\nUsage: `{usage}`"))
+            elif isinstance(error, commands.CheckFailure):
+                await ctx.send(embed=create_embed(title="Error", description=str(error) or "You cannot use this command here."))
+            else:
+                print(f"Error in {ctx.command} command: {getattr(error, 'original', error)}")
+                await ctx.send(embed=create_embed(title="Error", description="An error occurred while running this command."))
+        except Exception as e:
+            print(f"Error reporting {ctx.command} command error: {e}")
+
+    @commands.command(name="play", help="Plays a song, playlist or album from YouTube or Spotify, or the top YouTube result for a search.")
+    @rate_limited()
     async def play(self, ctx, *, query):
-        """Plays a song from YouTube or Spotify."""
+        """Plays a song, playlist or album from YouTube or Spotify, or the top YouTube result for a search."""
+        # A repeat of a request the same member still has in progress (e.g. a double-sent !play) joins it instead of queueing twice
+        await self._requests.do(("play", ctx.guild.id, ctx.author.id, query.strip()), self._play, ctx, query)
 
+    async def _play(self, ctx, query):
         try:
             voice_channel = ctx.author.voice.channel
             if voice_channel is None:
                 await ctx.send(embed=create_embed(title="Error", description="You must be in a voice channel to use this command."))
                 return
 
-            if ctx.guild.id not in self.music_players:
-                self.music_players[ctx.guild.id] = MusicPlayer(voice_channel)
-            music_player = self.music_players[ctx.guild.id]
+            music_player = await self.get_player(ctx, voice_channel)
 
-            if "youtube.com" in query or "youtu.be" in query:
+            if playlist_id(query) is not None:
+                # Import a Spotify playlist/album or YouTube playlist
+                try:
+                    await self._import_playlist(ctx, music_player, query)
+
+                except ExtractorBusy:
+                    await ctx.send(embed=create_embed(title="Busy", description="Too many songs are being looked up right now. Please try again in a moment."))
+                    return
+
+                except Exception as e:
+                    print(f"Error importing playlist: {e}")
+                    await ctx.send(embed=create_embed(title="Error", description="Failed to import the playlist. Please check the URL."))
+
+            elif "youtube.com" in query or "youtu.be" in query:
                 # Play from YouTube
                 try:
-                    info = youtube_dl.YoutubeDL({}).extract_info(query, download=False)
-                    url = info['formats'][0]['url']
-                    song_title = info['title']
+                    track = await self.resolver.resolve(ctx.guild.id, query)
+                    song_title = track['title']
 
-                    await music_player.add_song(url, song_title)
+                    # Queue the page URL; the player resolves it again through the cache
+                    await music_player.add_song(track['url'], song_title)
                     await ctx.send(embed=create_embed(title="Added to Queue", description=f"{song_title} added to the queue."))
 
+                except ExtractorBusy:
+                    await ctx.send(embed=create_embed(title="Busy", description="Too many songs are being looked up right now. Please try again in a moment."))
+                    return
+
                 except Exception as e:
                     print(f"Error playing YouTube song: {e}")
                     await ctx.send(embed=create_embed(title="Error", description="Failed to play the YouTube song. Please check the URL."))
@@ -56,19 +269,15 @@ class MusicCog(commands.Cog):
             elif "spotify.com" in query:
                 # Play from Spotify
                 try:
-                    # Get the Spotify track ID from the URL
-                    track_id = query.split("/")[-1]
-                    track_info = self.spotify.track(track_id)
-                    song_title = track_info['name']
-
-                    # Get the track's audio preview URL
-                    audio_preview_url = track_info['preview_url']
-                    if audio_preview_url is None:
+                    track = await self.resolver.resolve(ctx.guild.id, query)
+                    song_title = track['title']
+
+                    # Spotify tracks play their audio preview
+                    if track['stream_url'] is None:
                         await ctx.send(embed=create_embed(title="Error", description="This Spotify track doesn't have an audio preview."))
                         return
-                    
-                    # Add the preview URL to the queue
-                    await music_player.add_song(audio_preview_url, song_title)
+
+                    await music_player.add_song(track['url'], song_title)
                     await ctx.send(embed=create_embed(title="Added to Queue", description=f"{song_title} added to the queue."))
 
                 except Exception as e:
@@ -76,10 +285,22 @@ class MusicCog(commands.Cog):
                     await ctx.send(embed=create_embed(title="Error", description="Failed to play the Spotify song. Please check the URL."))
 
             else:
-                await ctx.send(embed=create_embed(title="Error", description="Invalid URL. Please provide a valid YouTube or Spotify link."))
+                # Search YouTube and play the top result
+                try:
+                    results = await self.youtube_search.search(ctx.guild.id, query)
+                    if not results:
+                        await ctx.send(embed=create_embed(title="Error", description="No results found for this YouTube query."))
+                        return
+
+                    await music_player.add_songs(results[:1])
+                    await ctx.send(embed=create_embed(title="Added to Queue", description=f"{results[0].title} added to the queue."))
 
-            if not music_player.is_playing:
-                await music_player.play_next()
+                except ExtractorBusy:
+                    await ctx.send(embed=create_embed(title="Busy", description="Too many songs are being looked up right now. Please try again in a moment."))
+
+                except Exception as e:
+                    print(f"Error searching YouTube: {e}")
+                    await ctx.send(embed=create_embed(title="Error", description="Failed to search YouTube. Please try another query."))
 
         except Exception as e:
             print(f"Error in play command: {e}")
@@ -178,8 +399,8 @@ class MusicCog(commands.Cog):
             print(f"Error in stop command: {e}")
             await ctx.send(embed=create_embed(title="Error", description="An error occurred while stopping the music."))
 
-    @commands.command(name="queue", help="Displays the current queue of songs.")
-    async def queue(self, ctx):
+    @commands.command(name="queue", help="Displays the current queue of songs. Usage: !queue [page]")
+    async def queue(self, ctx, page: int = 1):
         """Displays the current queue of songs."""
 
         try:
@@ -190,14 +411,13 @@ class MusicCog(commands.Cog):
 
             if ctx.guild.id in self.music_players:
                 music_player = self.music_players[ctx.guild.id]
-                queue = music_player.queue
 
-                if len(queue) == 0:
+                if len(music_player.queue) == 0:
                     await ctx.send(embed=create_embed(title="Queue", description="The queue is empty."))
                     return
 
-                embed = create_embed(title="Queue", description=f"**Now Playing:** {music_player.current_song}\n\n**Up Next:**\n{'\n'.join(f'{i+1}. {song}' for i, song in enumerate(queue))}")
-                await ctx.send(embed=embed)
+                # Only the page on screen is formatted, and the buttons edit this message instead of sending new ones
+                await QueueView(ctx.author, music_player, page).send(ctx)
             else:
                 await ctx.send(embed=create_embed(title="Error", description="No music is currently playing."))
 
@@ -205,6 +425,55 @@ class MusicCog(commands.Cog):
             print(f"Error in queue command: {e}")
             await ctx.send(embed=create_embed(title="Error", description="An error occurred while displaying the queue."))
 
+    @commands.command(name="shuffle", help="Shuffles the queue.")
+    async def shuffle(self, ctx):
+        """Shuffles the queue."""
+
+        try:
+            if ctx.guild.id in self.music_players and len(self.music_players[ctx.guild.id].queue) > 0:
+                await self.music_players[ctx.guild.id].shuffle()
+                await ctx.send(embed=create_embed(title="Shuffled", description="The queue has been shuffled."))
+            else:
+                await ctx.send(embed=create_embed(title="Error", description="The queue is empty."))
+
+        except Exception as e:
+            print(f"Error in shuffle command: {e}")
+            await ctx.send(embed=create_embed(title="Error", description="An error occurred while shuffling the queue."))
+
+    @commands.command(name="remove", help="Removes a song from the queue by its position.")
+    async def remove(self, ctx, position: int):
+        """Removes a song from the queue by its position."""
+
+        try:
+            music_player = self.music_players.get(ctx.guild.id)
+            if music_player is None or not 1 <= position <= len(music_player.queue):
+                await ctx.send(embed=create_embed(title="Error", description="There is no song at that position in the queue."))
+                return
+
+            song = await music_player.remove_song(position - 1)
+            await ctx.send(embed=create_embed(title="Removed", description=f"{song.title} removed from the queue."))
+
+        except Exception as e:
+            print(f"Error in remove command: {e}")
+            await ctx.send(embed=create_embed(title="Error", description="An error occurred while removing the song."))
+
+    @commands.command(name="move", help="Moves a song in the queue to a new position.")
+    async def move(self, ctx, source: int, destination: int):
+        """Moves a song in the queue to a new position."""
+
+        try:
+            music_player = self.music_players.get(ctx.guild.id)
+            if music_player is None or not (1 <= source <= len(music_player.queue) and 1 <= destination <= len(music_player.queue)):
+                await ctx.send(embed=create_embed(title="Error", description="There is no song at that position in the queue."))
+                return
+
+            song = await music_player.move_song(source - 1, destination - 1)
+            await ctx.send(embed=create_embed(title="Moved", description=f"{song.title} moved to position {destination}."))
+
+        except Exception as e:
+            print(f"Error in move command: {e}")
+            await ctx.send(embed=create_embed(title="Error", description="An error occurred while moving the song."))
+
     @commands.command(name="volume", help="Sets the volume of the music player. (0-100)")
     async def volume(self, ctx, volume: int):
         """Sets the volume of the music player. (0-100)"""
@@ -229,10 +498,77 @@ class MusicCog(commands.Cog):
             print(f"Error in volume command: {e}")
             await ctx.send(embed=create_embed(title="Error", description="An error occurred while setting the volume."))
 
-    @commands.command(name="search", help="Searches for a song on YouTube or Spotify.")
+    @commands.command(name="eq", help="Sets the bass and treble gains in dB. (-12 to 12)")
+    async def eq(self, ctx, bass: float, treble: float = 0.0):
+        """Sets the bass and treble gains in dB. (-12 to 12)"""
+
+        try:
+            if self.voice_workers is not None:
+                await ctx.send(embed=create_embed(title="Error", description="Audio effects are unavailable while voice workers are enabled; only !volume applies."))
+                return
+            if ctx.guild.id not in self.music_players:
+                await ctx.send(embed=create_embed(title="Error", description="No music is currently playing."))
+                return
+            if not (-12 <= bass <= 12 and -12 <= treble <= 12):
+                await ctx.send(embed=create_embed(title="Error", description="Gains must be between -12 and 12 dB."))
+                return
+
+            await self.music_players[ctx.guild.id].set_equalizer(bass, treble)
+            await ctx.send(embed=create_embed(title="Equalizer Set", description=f"Bass {bass:+g} dB, treble {treble:+g} dB."))
+
+        except Exception as e:
+            print(f"Error in eq command: {e}")
+            await ctx.send(embed=create_embed(title="Error", description="An error occurred while setting the equalizer."))
+
+    @commands.command(name="normalize", help="Turns loudness normalization on or off.")
+    async def normalize(self, ctx, enabled: bool):
+        """Turns loudness normalization on or off."""
+
+        try:
+            if self.voice_workers is not None:
+                await ctx.send(embed=create_embed(title="Error", description="Audio effects are unavailable while voice workers are enabled; only !volume applies."))
+                return
+            if ctx.guild.id not in self.music_players:
+                await ctx.send(embed=create_embed(title="Error", description="No music is currently playing."))
+                return
+
+            await self.music_players[ctx.guild.id].set_normalize(enabled)
+            await ctx.send(embed=create_embed(title="Normalization", description=f"Loudness normalization {'enabled' if enabled else 'disabled'}."))
+
+        except Exception as e:
+            print(f"Error in normalize command: {e}")
+            await ctx.send(embed=create_embed(title="Error", description="An error occurred while setting normalization."))
+
+    @commands.command(name="crossfade", help="Sets how many seconds consecutive songs overlap. (0-12)")
+    async def crossfade(self, ctx, seconds: float):
+        """Sets how many seconds consecutive songs overlap. (0-12)"""
+
+        try:
+            if self.voice_workers is not None:
+                await ctx.send(embed=create_embed(title="Error", description="Audio effects are unavailable while voice workers are enabled; only !volume applies."))
+                return
+            if ctx.guild.id not in self.music_players:
+                await ctx.send(embed=create_embed(title="Error", description="No music is currently playing."))
+                return
+            if not 0 <= seconds <= 12:
+                await ctx.send(embed=create_embed(title="Error", description="Crossfade must be between 0 and 12 seconds."))
+                return
+
+            await self.music_players[ctx.guild.id].set_crossfade(seconds)
+            description = f"Songs will crossfade over {seconds:g} seconds." if seconds else "Crossfading disabled."
+            await ctx.send(embed=create_embed(title="Crossfade Set", description=description))
+
+        except Exception as e:
+            print(f"Error in crossfade command: {e}")
+            await ctx.send(embed=create_embed(title="Error", description="An error occurred while setting the crossfade."))
+
+    @commands.command(name="search", help="Searches YouTube and lets you pick a result to queue.")
+    @rate_limited()
     async def search(self, ctx, *, query):
         """Searches for a song on YouTube or Spotify."""
+        await self._requests.do(("search", ctx.guild.id, ctx.author.id, query.strip()), self._search, ctx, query)
 
+    async def _search(self, ctx, query):
         try:
             voice_channel = ctx.author.voice.channel
             if voice_channel is None:
@@ -240,25 +576,28 @@ class MusicCog(commands.Cog):
                 return
 
             if "youtube.com" in query or "youtu.be" in query:
-                # Search on YouTube
+                # List the video or playlist entries without resolving their formats, and let the user pick one
                 try:
-                    info = youtube_dl.YoutubeDL({}).extract_info(query, download=False)
-                    results = info['entries']
-                    if results is None:
-                        await ctx.send(embed=create_embed(title="Error", description="No results found for this YouTube query."))
-                        return
+                    results = await self.youtube_search.lookup(ctx.guild.id, query)
 
-                    embed = create_embed(title="YouTube Search Results", description="\n".join(f"{i+1}. {result['title']}" for i, result in enumerate(results)))
-                    await ctx.send(embed=embed)
+                except ExtractorBusy:
+                    await ctx.send(embed=create_embed(title="Busy", description="Too many songs are being looked up right now. Please try again in a moment."))
+                    return
 
                 except Exception as e:
                     print(f"Error searching YouTube: {e}")
                     await ctx.send(embed=create_embed(title="Error", description="Failed to search YouTube. Please check your query."))
+                    return
+
+                if not results:
+                    await ctx.send(embed=create_embed(title="Error", description="No results found for this YouTube query."))
+                    return
+                await self._pick_result(ctx, voice_channel, results)
 
             elif "spotify.com" in query:
                 # Search on Spotify
                 try:
-                    results = self.spotify.search(q=query, type="track", limit=5)
+                    results = await self.spotify.search(q=query, type="track", limit=5)
                     tracks = results['tracks']['items']
                     if len(tracks) == 0:
                         await ctx.send(embed=create_embed(title="Error", description="No results found for this Spotify query."))
@@ -272,12 +611,51 @@ class MusicCog(commands.Cog):
                     await ctx.send(embed=create_embed(title="Error", description="Failed to search Spotify. Please check your query."))
 
             else:
-                await ctx.send(embed=create_embed(title="Error", description="Invalid URL. Please provide a valid YouTube or Spotify link."))
+                # Search YouTube by text and let the user pick a result
+                try:
+                    results = await self.youtube_search.search(ctx.guild.id, query)
+
+                except ExtractorBusy:
+                    await ctx.send(embed=create_embed(title="Busy", description="Too many songs are being looked up right now. Please try again in a moment."))
+                    return
+
+                except Exception as e:
+                    print(f"Error searching YouTube: {e}")
+                    await ctx.send(embed=create_embed(title="Error", description="Failed to search YouTube. Please try another query."))
+                    return
+
+                if not results:
+                    await ctx.send(embed=create_embed(title="Error", description="No results found for this YouTube query."))
+                    return
+                await self._pick_result(ctx, voice_channel, results)
 
         except Exception as e:
             print(f"Error in search command: {e}")
             await ctx.send(embed=create_embed(title="Error", description="An error occurred while searching for the song."))
 
+    async def _pick_result(self, ctx, voice_channel, results):
+        """Lists search results and queues the one the author replies with."""
+        listing = "\n".join(f"{i+1}. {track.title} ({format_duration(track.duration)})" for i, track in enumerate(results))
+        await ctx.send(embed=create_embed(
+            title="YouTube Search Results",
+            description=f"{listing}\n\nReply with a number within {music.SEARCH_PICK_TIMEOUT} seconds to add it to the queue.",
+        ))
+
+        def check(message):
+            return (message.author == ctx.author and message.channel == ctx.channel
+                    and message.content.isdigit() and 1 <= int(message.content) <= len(results))
+
+        try:
+            message = await self.bot.wait_for("message", check=check, timeout=music.SEARCH_PICK_TIMEOUT)
+        except asyncio.TimeoutError:
+            return
+
+        # The listed result is queued as is; it is resolved only when it is played
+        track = results[int(message.content) - 1]
+        music_player = await self.get_player(ctx, voice_channel)
+        await music_player.add_songs([track])
+        await ctx.send(embed=create_embed(title="Added to Queue", description=f"{track.title} added to the queue."))
+
 # Add the music cog to the bot
-def setup(bot):
-    bot.add_cog(MusicCog(bot))
\ No newline at end of file
+async def setup(bot):
+    await bot.add_cog(MusicCog(bot))
\ No newline at end of file
@@ -0,0 +1,129 @@
+from discord.ext import commands
+
+from utils.helpers import create_embed
+
+class PlaylistsCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @property
+    def db(self):
+        return getattr(self.bot, "db", None)
+
+    async def cog_check(self, ctx):
+        if self.db is None:
+            await ctx.send(embed=create_embed(title="Error", description="Saved playlists are not available right now."))
+            return False
+        return ctx.guild is not None
+
+    @commands.group(name="playlist", invoke_without_command=True, help="Lists this server's saved playlists.")
+    async def playlist(self, ctx):
+        """Lists this server's saved playlists."""
+        try:
+            names = await self.db.list_playlists(ctx.guild.id)
+            if not names:
+                await ctx.send(embed=create_embed(title="Playlists", description="This server has no saved playlists."))
+                return
+            await ctx.send(embed=create_embed(title="Playlists", description="\n".join(f"• {name}" for name in names)))
+
+        except Exception as e:
+            print(f"Error in playlist command: {e}")
+            await ctx.send(embed=create_embed(title="Error", description="An error occurred while listing the playlists."))
+
+    @playlist.command(name="save", help="Saves the current song and queue as a playlist.")
+    async def save(self, ctx, *, name):
+        """Saves the current song and queue as a playlist."""
+        try:
+            music_cog = self.bot.get_cog("MusicCog")
+            music_player = music_cog.music_players.get(ctx.guild.id) if music_cog else None
+            songs = music_player.snapshot() if music_player else []
+            if not songs:
+                await ctx.send(embed=create_embed(title="Error", description="The queue is empty."))
+                return
+
+            await self.db.save_playlist(ctx.guild, ctx.author, name, songs)
+            await ctx.send(embed=create_embed(title="Playlist Saved", description=f"Saved {len(songs)} songs as **{name}**."))
+
+        except Exception as e:
+            print(f"Error in playlist save command: {e}")
+            await ctx.send(embed=create_embed(title="Error", description="An error occurred while saving the playlist."))
+
+    @playlist.command(name="load", help="Adds a saved playlist to the queue.")
+    async def load(self, ctx, *, name):
+        """Adds a saved playlist to the queue."""
+        try:
+            voice_channel = ctx.author.voice.channel if ctx.author.voice else None
+            if voice_channel is None:
+                await ctx.send(embed=create_embed(title="Error", description="You must be in a voice channel to use this command."))
+                return
+
+            playlist_id = await self.db.get_playlist_id(ctx.guild.id, name)
+            if playlist_id is None:
+                await ctx.send(embed=create_embed(title="Error", description=f"No playlist named **{name}** was found."))
+                return
+
+            # Songs are enqueued page by page, so playback starts before a large playlist is fully read
+            music_player = await self.bot.get_cog("MusicCog").get_player(ctx, voice_channel)
+            added = 0
+            async for songs in self.db.iter_songs(playlist_id):
+                await music_player.add_songs(songs)
+                added += len(songs)
+            await ctx.send(embed=create_embed(title="Added to Queue", description=f"{added} songs from **{name}** added to the queue."))
+
+        except Exception as e:
+            print(f"Error in playlist load command: {e}")
+            await ctx.send(embed=create_embed(title="Error", description="An error occurred while loading the playlist."))
+
+    @playlist.command(name="add", help="Adds the current song to a saved playlist.")
+    async def add(self, ctx, *, name):
+        """Adds the current song to a saved playlist."""
+        try:
+            music_cog = self.bot.get_cog("MusicCog")
+            music_player = music_cog.music_players.get(ctx.guild.id) if music_cog else None
+            if music_player is None or music_player.current_song is None:
+                await ctx.send(embed=create_embed(title="Error", description="No music is currently playing."))
+                return
+
+            playlist_id = await self.db.get_playlist_id(ctx.guild.id, name)
+            if playlist_id is None:
+                await ctx.send(embed=create_embed(title="Error", description=f"No playlist named **{name}** was found."))
+                return
+
+            await self.db.add_songs(playlist_id, [music_player.current_song])
+            await ctx.send(embed=create_embed(title="Playlist Updated", description=f"{music_player.current_song.title} added to **{name}**."))
+
+        except Exception as e:
+            print(f"Error in playlist add command: {e}")
+            await ctx.send(embed=create_embed(title="Error", description="An error occurred while updating the playlist."))
+
+    @playlist.command(name="remove", help="Removes songs from a saved playlist by position. Usage: !playlist remove <name> <positions...>")
+    async def remove(self, ctx, name, *positions: int):
+        """Removes songs from a saved playlist by position."""
+        try:
+            playlist_id = await self.db.get_playlist_id(ctx.guild.id, name)
+            if playlist_id is None:
+                await ctx.send(embed=create_embed(title="Error", description=f"No playlist named **{name}** was found."))
+                return
+
+            removed = await self.db.remove_songs(playlist_id, [position - 1 for position in positions if position > 0])
+            await ctx.send(embed=create_embed(title="Playlist Updated", description=f"Removed {removed} songs from **{name}**."))
+
+        except Exception as e:
+            print(f"Error in playlist remove command: {e}")
+            await ctx.send(embed=create_embed(title="Error", description="An error occurred while updating the playlist."))
+
+    @playlist.command(name="delete", help="Deletes a saved playlist.")
+    async def delete(self, ctx, *, name):
+        """Deletes a saved playlist."""
+        try:
+            if await self.db.delete_playlist(ctx.guild.id, name):
+                await ctx.send(embed=create_embed(title="Playlist Deleted", description=f"Deleted **{name}**."))
+            else:
+                await ctx.send(embed=create_embed(title="Error", description=f"No playlist named **{name}** was found."))
+
+        except Exception as e:
+            print(f"Error in playlist delete command: {e}")
+            await ctx.send(embed=create_embed(title="Error", description="An error occurred while deleting the playlist."))
+
+async def setup(bot):
+    await bot.add_cog(PlaylistsCog(bot))
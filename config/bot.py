@@ -0,0 +1,34 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+COMMAND_PREFIX = os.getenv("COMMAND_PREFIX", "!")
+
+# Sharding (unset lets Discord recommend a shard count and runs every shard in this process)
+SHARD_COUNT = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None
+SHARD_IDS = [int(shard_id) for shard_id in os.getenv("SHARD_IDS").split(",")] if os.getenv("SHARD_IDS") else None  # e.g. "0,1,2,3"
+
+# Gateway intents and member caching: "minimal" (music and playlists only), "moderation"
+# (adds member events for the moderation and user info commands) or "full" (every intent)
+INTENTS_PROFILE = os.getenv("INTENTS_PROFILE", "moderation")
+
+# Members fetched on demand (see utils.lookup)
+LOOKUP_CACHE_SIZE = int(os.getenv("LOOKUP_CACHE_SIZE", 10000))
+LOOKUP_CACHE_TTL = int(os.getenv("LOOKUP_CACHE_TTL", 5 * 60))
+
+# Metrics (see utils.metrics)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))  # 0 disables the Prometheus endpoint
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", 0.5))  # Seconds between event loop lag measurements
+
+# Stall detection and profiling (see utils.watchdog)
+WATCHDOG_THRESHOLD = float(os.getenv("WATCHDOG_THRESHOLD", 0))  # Seconds of event loop stall reported with a stack; 0 disables
+PROFILER_PATH = os.getenv("PROFILER_PATH")  # Optional directory for sampled folded stacks
+PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL", 0.01))
+PROFILER_DUMP_INTERVAL = float(os.getenv("PROFILER_DUMP_INTERVAL", 60))
+
+# Warm standby for rolling deploys: every process started with the same lock file logs in and loads its
+# cogs, but only the one holding the lock connects to the gateway; the next takes over when it exits
+STANDBY_LOCK_PATH = os.getenv("STANDBY_LOCK_PATH")
+STANDBY_POLL_INTERVAL = float(os.getenv("STANDBY_POLL_INTERVAL", 0.25))  # Seconds between attempts to take the lock
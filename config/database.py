@@ -9,4 +9,16 @@ DATABASE_NAME = os.getenv("DATABASE_NAME", None)
 DATABASE_USER = os.getenv("DATABASE_USER", None)
 DATABASE_PASSWORD = os.getenv("DATABASE_PASSWORD", None)
 DATABASE_HOST = os.getenv("DATABASE_HOST", None)
-DATABASE_PORT = int(os.getenv("DATABASE_PORT", 5432))
\ No newline at end of file
+DATABASE_PORT = int(os.getenv("DATABASE_PORT", 5432))
+
+# Connection pool tuning
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", 10))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", 20))
+DATABASE_POOL_TIMEOUT = int(os.getenv("DATABASE_POOL_TIMEOUT", 5))
+DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", 30 * 60))
+DATABASE_STATEMENT_CACHE_SIZE = int(os.getenv("DATABASE_STATEMENT_CACHE_SIZE", 256))
+DATABASE_ECHO = os.getenv("DATABASE_ECHO", "false").lower() == "true"
+
+# Playlist reads and writes
+DATABASE_PAGE_SIZE = int(os.getenv("DATABASE_PAGE_SIZE", 500))  # Entries loaded per query when streaming a playlist
+DATABASE_BATCH_SIZE = int(os.getenv("DATABASE_BATCH_SIZE", 1000))  # Rows written per statement in bulk edits
@@ -0,0 +1,80 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Extraction worker pool
+EXTRACTOR_WORKERS = int(os.getenv("EXTRACTOR_WORKERS", 4))
+EXTRACTOR_MAX_PENDING = int(os.getenv("EXTRACTOR_MAX_PENDING", 50))
+EXTRACTOR_BUSY_RETRY = float(os.getenv("EXTRACTOR_BUSY_RETRY", 0.5))  # First wait before a song load retries a full backlog; doubles up to 5 s
+
+# FFmpeg streaming playback
+FFMPEG_BEFORE_OPTIONS = os.getenv("FFMPEG_BEFORE_OPTIONS", "-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5")
+FFMPEG_OPTIONS = os.getenv("FFMPEG_OPTIONS", "-vn")
+
+# Track resolution cache
+RESOLVE_CACHE_SIZE = int(os.getenv("RESOLVE_CACHE_SIZE", 2048))
+RESOLVE_CACHE_TTL = int(os.getenv("RESOLVE_CACHE_TTL", 6 * 60 * 60))
+RESOLVE_CACHE_PATH = os.getenv("RESOLVE_CACHE_PATH")  # Optional SQLite file for a persistent tier
+RESOLVE_CACHE_DISK_SIZE = int(os.getenv("RESOLVE_CACHE_DISK_SIZE", 50000))
+STREAM_URL_EXPIRY_MARGIN = int(os.getenv("STREAM_URL_EXPIRY_MARGIN", 10 * 60))
+
+# Look-ahead resolution of upcoming queue entries
+PREFETCH_COUNT = int(os.getenv("PREFETCH_COUNT", 3))
+PREBUFFER_SECONDS = int(os.getenv("PREBUFFER_SECONDS", 5))  # 0 disables pre-buffering of the next song
+
+# Queue display
+QUEUE_PAGE_SIZE = int(os.getenv("QUEUE_PAGE_SIZE", 10))
+VIEW_TIMEOUT = float(os.getenv("VIEW_TIMEOUT", 120))  # Seconds the page buttons of !queue and !help stay active
+
+# Playlist and album imports
+MAX_PLAYLIST_SIZE = int(os.getenv("MAX_PLAYLIST_SIZE", 5000))
+IMPORT_CONCURRENCY = int(os.getenv("IMPORT_CONCURRENCY", 4))
+IMPORT_RESOLVE_COUNT = int(os.getenv("IMPORT_RESOLVE_COUNT", 25))  # YouTube entries resolved up front; the rest are prefetched
+
+# Idle player eviction
+IDLE_TIMEOUT = int(os.getenv("IDLE_TIMEOUT", 5 * 60))
+EMPTY_CHANNEL_TIMEOUT = int(os.getenv("EMPTY_CHANNEL_TIMEOUT", 60))
+REAPER_INTERVAL = int(os.getenv("REAPER_INTERVAL", 30))
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "sessions.db")
+
+# Spotify API gateway
+SPOTIFY_BATCH_WINDOW = float(os.getenv("SPOTIFY_BATCH_WINDOW", 0.05))  # Seconds to collect track lookups into one request
+SPOTIFY_MAX_RETRIES = int(os.getenv("SPOTIFY_MAX_RETRIES", 3))
+
+# Local Opus cache of frequently played tracks
+AUDIO_CACHE_PATH = os.getenv("AUDIO_CACHE_PATH")  # Optional directory; unset disables the cache
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+AUDIO_CACHE_ADMIT_AFTER = int(os.getenv("AUDIO_CACHE_ADMIT_AFTER", 3))  # Plays before a track is transcoded into the cache
+AUDIO_CACHE_BITRATE = os.getenv("AUDIO_CACHE_BITRATE", "128k")
+AUDIO_CACHE_TRANSCODES = int(os.getenv("AUDIO_CACHE_TRANSCODES", 2))  # Concurrent background transcodes
+
+# Voice worker processes (0 keeps audio encoding in the bot process)
+VOICE_WORKERS = int(os.getenv("VOICE_WORKERS", 0))
+VOICE_WORKER_BUFFER = int(os.getenv("VOICE_WORKER_BUFFER", 250))  # Opus packets (20 ms each) encoded ahead per stream
+VOICE_WORKER_LOAD_INTERVAL = float(os.getenv("VOICE_WORKER_LOAD_INTERVAL", 2))  # Seconds between worker load reports
+VOICE_WORKER_READ_TIMEOUT = float(os.getenv("VOICE_WORKER_READ_TIMEOUT", 10))  # Seconds without packets before a stream is dropped
+
+# Audio effects (see utils.dsp)
+VOLUME_RAMP_MS = int(os.getenv("VOLUME_RAMP_MS", 100))  # Time taken to ramp between volume levels
+CROSSFADE_SECONDS = float(os.getenv("CROSSFADE_SECONDS", 0))  # Default overlap between consecutive songs; 0 disables
+NORMALIZE = os.getenv("NORMALIZE", "false").lower() == "true"  # Default loudness normalization
+
+# YouTube text search
+SEARCH_RESULTS = int(os.getenv("SEARCH_RESULTS", 5))  # Hits listed by !search
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", 1024))
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", 60 * 60))
+SEARCH_PICK_TIMEOUT = int(os.getenv("SEARCH_PICK_TIMEOUT", 30))  # Seconds to pick a !search result
+
+# Checkpoints of active players, resumed after a restart or crash
+CHECKPOINT_INTERVAL = float(os.getenv("CHECKPOINT_INTERVAL", 5))  # Seconds between batched writes; 0 disables checkpointing
+CHECKPOINT_RESTORE_STAGGER = float(os.getenv("CHECKPOINT_RESTORE_STAGGER", 0.5))  # Seconds between players rejoining on startup
+
+# Rate limits of !play and !search: tokens per second and burst size; a rate of 0 disables the limit
+RATE_LIMIT_USER_RATE = float(os.getenv("RATE_LIMIT_USER_RATE", 0.5))
+RATE_LIMIT_USER_BURST = int(os.getenv("RATE_LIMIT_USER_BURST", 5))
+RATE_LIMIT_GUILD_RATE = float(os.getenv("RATE_LIMIT_GUILD_RATE", 2))
+RATE_LIMIT_GUILD_BURST = int(os.getenv("RATE_LIMIT_GUILD_BURST", 20))
+RATE_LIMIT_GLOBAL_RATE = float(os.getenv("RATE_LIMIT_GLOBAL_RATE", 50))
+RATE_LIMIT_GLOBAL_BURST = int(os.getenv("RATE_LIMIT_GLOBAL_BURST", 200))
+RATE_LIMIT_MAX_BUCKETS = int(os.getenv("RATE_LIMIT_MAX_BUCKETS", 50000))  # Buckets kept in memory
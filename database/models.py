@@ -1,46 +1,18 @@
-import os
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from datetime import datetime
 
-from config import database
-
-load_dotenv()
-
-# Create the SQLAlchemy engine
-if database.DATABASE_TYPE == "postgres":
-    engine = create_engine(database.DATABASE_URL, echo=True)
-elif database.DATABASE_TYPE == "mongodb":
-    # Implement MongoDB engine setup here
-    # You'll likely need to use pymongo for MongoDB
-    # See pymongo documentation for details
-    pass
-else:
-    raise ValueError("Invalid database type specified in .env file.")
+from sqlalchemy import BigInteger, Column, DateTime, Float, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.orm import declarative_base, relationship
 
 # Create the base class for all models
 Base = declarative_base()
 
-# Create a session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Dependency to get a database session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # Define the database models here
-# ...
-# Example models (replace with your actual models):
+# Discord IDs are 64-bit snowflakes, so they are stored as BigInteger
 
 # User model (if storing user data)
 class User(Base):
     __tablename__ = "users"
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(BigInteger, primary_key=True, index=True, autoincrement=False)
     username = Column(String, nullable=False)
     discriminator = Column(String, nullable=False)
     # ... (add other attributes as needed)
@@ -48,22 +20,41 @@ class User(Base):
 # Server model (if storing server data)
 class Server(Base):
     __tablename__ = "servers"
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(BigInteger, primary_key=True, index=True, autoincrement=False)
     name = Column(String, nullable=False)
     # ... (add other attributes as needed)
 
+# Track model (one row per distinct source track, shared by every playlist that contains it)
+class Track(Base):
+    __tablename__ = "tracks"
+    id = Column(Integer, primary_key=True, index=True)
+    source_id = Column(String, nullable=False, unique=True)  # e.g. "youtube:<id>" or "spotify:track:<id>"
+    url = Column(String, nullable=False)
+    title = Column(String, nullable=False)
+    duration = Column(Float)
+
 # Playlist model
 class Playlist(Base):
     __tablename__ = "playlists"
+    __table_args__ = (UniqueConstraint("server_id", "name"),)
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
-    server_id = Column(Integer, ForeignKey("servers.id"), nullable=False)
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    songs = Column(ARRAY(String), nullable=False)
+    server_id = Column(BigInteger, ForeignKey("servers.id"), nullable=False, index=True)
+    owner_id = Column(BigInteger, ForeignKey("users.id"), nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     server = relationship("Server", backref="playlists")
     owner = relationship("User", backref="playlists")
 
-# ... (add other models as needed)
\ No newline at end of file
+# Playlist entry model (the ordered link between a playlist and its tracks)
+class PlaylistEntry(Base):
+    __tablename__ = "playlist_entries"
+    playlist_id = Column(Integer, ForeignKey("playlists.id", ondelete="CASCADE"), primary_key=True)  # (playlist_id, position) index
+    position = Column(Integer, primary_key=True)
+    track_id = Column(Integer, ForeignKey("tracks.id"), nullable=False, index=True)
+
+    playlist = relationship("Playlist", backref="entries")
+    track = relationship("Track")
+
+# ... (add other models as needed)
@@ -0,0 +1,300 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from config import database
+from database.models import Base, Playlist, PlaylistEntry, Server, User
+from database.models import Track as TrackModel
+from utils.resolver import canonical_id
+from utils.track_queue import Track
+
+def _batches(items, size=None):
+    size = size or database.DATABASE_BATCH_SIZE
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class PlaylistRepository(ABC):
+    """Stores saved playlists, independently of the configured database backend.
+
+    Playlists are ordered lists of tracks. Track metadata is stored once per
+    source track and shared between playlists; songs are passed in and
+    returned as `utils.track_queue.Track` records.
+    """
+
+    async def init(self):
+        """Prepares the schema (tables or indexes) on startup."""
+
+    @abstractmethod
+    async def save_playlist(self, guild, owner, name, songs):
+        """Creates or replaces a guild's playlist.
+
+        Args:
+            guild (discord.Guild): The guild the playlist belongs to.
+            owner (discord.abc.User): The user saving the playlist.
+            name (str): The playlist name, unique per guild.
+            songs (list[Track]): The songs, in order.
+        """
+
+    @abstractmethod
+    async def get_playlist_id(self, server_id, name):
+        """Returns the ID of a guild's playlist, or None if it does not exist."""
+
+    @abstractmethod
+    async def add_songs(self, playlist_id, songs):
+        """Appends songs to the end of a playlist."""
+
+    @abstractmethod
+    async def remove_songs(self, playlist_id, indexes):
+        """Removes the songs at the given 0-based indexes of a playlist, returning how many were removed."""
+
+    @abstractmethod
+    async def iter_songs(self, playlist_id, page_size=None):
+        """Yields the songs of a playlist in order, one page (list of `Track`) per query."""
+
+    @abstractmethod
+    async def list_playlists(self, server_id):
+        """Returns the names of a guild's playlists."""
+
+    @abstractmethod
+    async def delete_playlist(self, server_id, name):
+        """Deletes a playlist, returning whether it existed."""
+
+    async def close(self):
+        """Releases pooled connections."""
+
+class SQLPlaylistRepository(PlaylistRepository):
+    """Playlist storage in PostgreSQL through the pooled asyncio engine."""
+
+    def __init__(self, engine, session_factory):
+        self.engine = engine
+        self.sessions = session_factory
+
+    async def init(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def save_playlist(self, guild, owner, name, songs):
+        async with self.sessions.begin() as session:
+            await session.execute(insert(Server).values(id=guild.id, name=guild.name).on_conflict_do_nothing())
+            await session.execute(
+                insert(User).values(id=owner.id, username=owner.name, discriminator=owner.discriminator).on_conflict_do_nothing()
+            )
+            statement = insert(Playlist).values(server_id=guild.id, owner_id=owner.id, name=name)
+            playlist_id = await session.scalar(statement.on_conflict_do_update(
+                index_elements=[Playlist.server_id, Playlist.name],
+                set_={"owner_id": owner.id, "updated_at": datetime.utcnow()},
+            ).returning(Playlist.id))
+
+            await session.execute(delete(PlaylistEntry).where(PlaylistEntry.playlist_id == playlist_id))
+            await self._insert_entries(session, playlist_id, 0, songs)
+
+    async def get_playlist_id(self, server_id, name):
+        async with self.sessions() as session:
+            return await session.scalar(select(Playlist.id).where(Playlist.server_id == server_id, Playlist.name == name))
+
+    async def add_songs(self, playlist_id, songs):
+        async with self.sessions.begin() as session:
+            last = await session.scalar(select(func.max(PlaylistEntry.position)).where(PlaylistEntry.playlist_id == playlist_id))
+            await self._insert_entries(session, playlist_id, 0 if last is None else last + 1, songs)
+            await session.execute(update(Playlist).where(Playlist.id == playlist_id).values(updated_at=datetime.utcnow()))
+
+    async def remove_songs(self, playlist_id, indexes):
+        ranked = select(
+            PlaylistEntry.position,
+            (func.row_number().over(order_by=PlaylistEntry.position) - 1).label("index"),
+        ).where(PlaylistEntry.playlist_id == playlist_id).subquery()
+        positions = select(ranked.c.position).where(ranked.c.index.in_(list(indexes)))
+
+        async with self.sessions.begin() as session:
+            result = await session.execute(
+                delete(PlaylistEntry).where(PlaylistEntry.playlist_id == playlist_id, PlaylistEntry.position.in_(positions))
+            )
+            return result.rowcount
+
+    async def iter_songs(self, playlist_id, page_size=None):
+        page_size = page_size or database.DATABASE_PAGE_SIZE
+        last_position = -1
+        while True:
+            # Keyset pagination over the (playlist_id, position) primary key
+            async with self.sessions() as session:
+                rows = (await session.execute(
+                    select(PlaylistEntry.position, TrackModel.url, TrackModel.title, TrackModel.duration)
+                    .join(TrackModel, TrackModel.id == PlaylistEntry.track_id)
+                    .where(PlaylistEntry.playlist_id == playlist_id, PlaylistEntry.position > last_position)
+                    .order_by(PlaylistEntry.position)
+                    .limit(page_size)
+                )).all()
+
+            if not rows:
+                return
+            yield [Track(row.url, row.title, row.duration) for row in rows]
+            if len(rows) < page_size:
+                return
+            last_position = rows[-1].position
+
+    async def list_playlists(self, server_id):
+        async with self.sessions() as session:
+            result = await session.scalars(select(Playlist.name).where(Playlist.server_id == server_id).order_by(Playlist.name))
+            return list(result)
+
+    async def delete_playlist(self, server_id, name):
+        async with self.sessions.begin() as session:
+            result = await session.execute(delete(Playlist).where(Playlist.server_id == server_id, Playlist.name == name))
+            return result.rowcount > 0
+
+    async def close(self):
+        await self.engine.dispose()
+
+    async def _upsert_tracks(self, session, songs):
+        """Stores each distinct track once, returning a source ID -> track ID map."""
+        tracks = {canonical_id(song.url): song for song in songs}
+        track_ids = {}
+        for batch in _batches(list(tracks.items())):
+            statement = insert(TrackModel).values([
+                {"source_id": source_id, "url": song.url, "title": song.title, "duration": song.duration}
+                for source_id, song in batch
+            ])
+            result = await session.execute(statement.on_conflict_do_update(
+                index_elements=[TrackModel.source_id],
+                set_={"title": statement.excluded.title, "duration": func.coalesce(statement.excluded.duration, TrackModel.duration)},
+            ).returning(TrackModel.source_id, TrackModel.id))
+            track_ids.update(result.tuples().all())
+        return track_ids
+
+    async def _insert_entries(self, session, playlist_id, first_position, songs):
+        track_ids = await self._upsert_tracks(session, songs)
+        entries = [
+            {"playlist_id": playlist_id, "position": first_position + i, "track_id": track_ids[canonical_id(song.url)]}
+            for i, song in enumerate(songs)
+        ]
+        for batch in _batches(entries):
+            await session.execute(insert(PlaylistEntry).values(batch))
+
+class MongoPlaylistRepository(PlaylistRepository):
+    """Playlist storage in MongoDB through pymongo's asyncio client.
+
+    Mirrors the SQL layout: `tracks` keyed by source ID, `playlists`, and
+    `playlist_entries` indexed on `(playlist_id, position)`.
+    """
+
+    def __init__(self, client, db):
+        self.client = client
+        self.playlists = db["playlists"]
+        self.tracks = db["tracks"]
+        self.entries = db["playlist_entries"]
+
+    async def init(self):
+        await self.playlists.create_index([("server_id", 1), ("name", 1)], unique=True)
+        await self.playlists.create_index("owner_id")
+        await self.entries.create_index([("playlist_id", 1), ("position", 1)], unique=True)
+
+    async def save_playlist(self, guild, owner, name, songs):
+        from pymongo import ReturnDocument
+
+        now = datetime.utcnow()
+        playlist = await self.playlists.find_one_and_update(
+            {"server_id": guild.id, "name": name},
+            {"$set": {"owner_id": owner.id, "updated_at": now}, "$setOnInsert": {"created_at": now}},
+            upsert=True, return_document=ReturnDocument.AFTER, projection={"_id": 1},
+        )
+        await self.entries.delete_many({"playlist_id": playlist["_id"]})
+        await self._insert_entries(playlist["_id"], 0, songs)
+
+    async def get_playlist_id(self, server_id, name):
+        playlist = await self.playlists.find_one({"server_id": server_id, "name": name}, {"_id": 1})
+        return playlist["_id"] if playlist else None
+
+    async def add_songs(self, playlist_id, songs):
+        last = await self.entries.find_one({"playlist_id": playlist_id}, {"position": 1}, sort=[("position", -1)])
+        await self._insert_entries(playlist_id, 0 if last is None else last["position"] + 1, songs)
+        await self.playlists.update_one({"_id": playlist_id}, {"$set": {"updated_at": datetime.utcnow()}})
+
+    async def remove_songs(self, playlist_id, indexes):
+        indexes = set(indexes)
+        if not indexes:
+            return 0
+
+        # Map indexes to stored positions by walking the (playlist_id, position) index up to the last one
+        positions = []
+        cursor = self.entries.find({"playlist_id": playlist_id}, {"position": 1}).sort("position", 1).limit(max(indexes) + 1)
+        index = 0
+        async for entry in cursor:
+            if index in indexes:
+                positions.append(entry["position"])
+            index += 1
+
+        result = await self.entries.delete_many({"playlist_id": playlist_id, "position": {"$in": positions}})
+        return result.deleted_count
+
+    async def iter_songs(self, playlist_id, page_size=None):
+        page_size = page_size or database.DATABASE_PAGE_SIZE
+        last_position = -1
+        while True:
+            entries = await self.entries.find(
+                {"playlist_id": playlist_id, "position": {"$gt": last_position}}, {"position": 1, "track_id": 1},
+            ).sort("position", 1).limit(page_size).to_list()
+            if not entries:
+                return
+
+            tracks = {
+                track["_id"]: track
+                async for track in self.tracks.find({"_id": {"$in": list({entry["track_id"] for entry in entries})}})
+            }
+            yield [
+                Track(tracks[entry["track_id"]]["url"], tracks[entry["track_id"]]["title"], tracks[entry["track_id"]].get("duration"))
+                for entry in entries if entry["track_id"] in tracks
+            ]
+            if len(entries) < page_size:
+                return
+            last_position = entries[-1]["position"]
+
+    async def list_playlists(self, server_id):
+        cursor = self.playlists.find({"server_id": server_id}, {"name": 1}).sort("name", 1)
+        return [playlist["name"] async for playlist in cursor]
+
+    async def delete_playlist(self, server_id, name):
+        playlist = await self.playlists.find_one_and_delete({"server_id": server_id, "name": name}, projection={"_id": 1})
+        if playlist is None:
+            return False
+        await self.entries.delete_many({"playlist_id": playlist["_id"]})
+        return True
+
+    async def close(self):
+        await self.client.close()
+
+    async def _insert_entries(self, playlist_id, first_position, songs):
+        from pymongo import UpdateOne
+
+        tracks = {canonical_id(song.url): song for song in songs}
+        for batch in _batches(list(tracks.items())):
+            await self.tracks.bulk_write([
+                UpdateOne({"_id": source_id}, {"$set": {"url": song.url, "title": song.title, "duration": song.duration}}, upsert=True)
+                for source_id, song in batch
+            ], ordered=False)
+
+        entries = [
+            {"playlist_id": playlist_id, "position": first_position + i, "track_id": canonical_id(song.url)}
+            for i, song in enumerate(songs)
+        ]
+        for batch in _batches(entries):
+            await self.entries.insert_many(batch, ordered=False)
+
+def create_repository():
+    """Creates the playlist repository for the configured `DATABASE_TYPE`."""
+    if database.DATABASE_TYPE == "postgres":
+        from database.session import SessionLocal, engine
+        return SQLPlaylistRepository(engine, SessionLocal)
+
+    if database.DATABASE_TYPE == "mongodb":
+        from pymongo import AsyncMongoClient
+        client = AsyncMongoClient(
+            database.DATABASE_URL,
+            maxPoolSize=database.DATABASE_POOL_SIZE + database.DATABASE_MAX_OVERFLOW,
+            waitQueueTimeoutMS=database.DATABASE_POOL_TIMEOUT * 1000,
+        )
+        db = client[database.DATABASE_NAME] if database.DATABASE_NAME else client.get_default_database()
+        return MongoPlaylistRepository(client, db)
+
+    raise ValueError("Invalid database type specified in .env file.")
@@ -0,0 +1,35 @@
+from contextlib import asynccontextmanager
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from config import database
+
+def async_database_url(url):
+    """Returns `url` with the asyncpg driver selected."""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+def create_engine():
+    """Creates the pooled asyncio engine used for PostgreSQL."""
+    return create_async_engine(
+        async_database_url(database.DATABASE_URL),
+        echo=database.DATABASE_ECHO,
+        pool_size=database.DATABASE_POOL_SIZE,
+        max_overflow=database.DATABASE_MAX_OVERFLOW,
+        pool_timeout=database.DATABASE_POOL_TIMEOUT,
+        pool_recycle=database.DATABASE_POOL_RECYCLE,
+        pool_pre_ping=True,
+        connect_args={"prepared_statement_cache_size": database.DATABASE_STATEMENT_CACHE_SIZE},
+    )
+
+# Create the engine and session factory (PostgreSQL only; MongoDB uses its own client)
+engine = create_engine() if database.DATABASE_TYPE == "postgres" else None
+SessionLocal = async_sessionmaker(engine, expire_on_commit=False) if engine is not None else None
+
+# Dependency to get a database session
+@asynccontextmanager
+async def get_db():
+    async with SessionLocal() as db:
+        yield db
@@ -1,48 +1,168 @@
+import time
+STARTED_AT = time.perf_counter()  # Taken before the other imports so that they count towards startup time
+
 import discord
 from discord.ext import commands
 import os
 import asyncio
 
-from config import secrets, database
+from config import bot as bot_config, secrets, database
+from utils.lookup import LookupService
 
 # Load environment variables from .env file
 if os.path.exists(".env"):
     from dotenv import load_dotenv
     load_dotenv()
 
-# Define bot prefix
-bot = commands.Bot(command_prefix='!', intents=discord.Intents.all())
+# Select the gateway events and member cache of the configured profile
+def create_intents(profile):
+    if profile == "full":
+        intents = discord.Intents.all()
+        return intents, discord.MemberCacheFlags.from_intents(intents)
+    if profile not in ("minimal", "moderation"):
+        raise ValueError(f"Invalid intents profile: {profile}")
+
+    # Prefix commands and voice playback; presences and typing events are never subscribed to
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.guild_messages = True
+    intents.dm_messages = True
+    intents.message_content = True
+    intents.voice_states = True
+    # Moderation commands resolve their targets on demand instead of caching every member
+    intents.members = profile == "moderation"
+
+    # Only members in voice channels are cached, which is what the music commands look up
+    return intents, discord.MemberCacheFlags(voice=True, joined=False)
+
+intents, member_cache_flags = create_intents(bot_config.INTENTS_PROFILE)
+
+# Define bot prefix (an auto-sharded bot runs either every shard or the configured shard range)
+bot = commands.AutoShardedBot(
+    command_prefix=bot_config.COMMAND_PREFIX,
+    help_command=None,  # Replaced by the !help command in cogs/commands.py
+    intents=intents,
+    member_cache_flags=member_cache_flags,
+    chunk_guilds_at_startup=bot_config.INTENTS_PROFILE == "full",
+    shard_count=bot_config.SHARD_COUNT,
+    shard_ids=bot_config.SHARD_IDS,
+)
+
+# ID-indexed guild and member lookups shared by the cogs
+bot.lookup = LookupService(bot)
+
+# Measure how long each startup phase takes
+class StartupTimer:
+    def __init__(self, started_at):
+        self.phases = []
+        self.reported = False
+        self._last = started_at
+
+    def mark(self, phase):
+        """Ends `phase`, which started when the previous one ended."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def skip(self):
+        """Starts the next phase now, leaving the time since the previous one out of the report."""
+        self._last = time.perf_counter()
+
+    def report(self):
+        self.reported = True
+        total = sum(seconds for _, seconds in self.phases)
+        print(f"Started in {total:.2f}s: " + ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in self.phases))
 
-# Load cogs
-async def load_cogs():
-    for filename in os.listdir("./cogs"):
+startup = StartupTimer(STARTED_AT)
+preload_task = None
+
+# Load cogs once, after logging in and before connecting to the gateway
+async def setup_hook():
+    startup.mark("login")
+    for filename in sorted(os.listdir("./cogs")):
         if filename.endswith(".py"):
             await bot.load_extension(f"cogs.{filename[:-3]}")
+    startup.mark("extensions")
+
+bot.setup_hook = setup_hook
+
+# Import the libraries that the cogs only import on first use (see utils.extractor and utils.spotify)
+def preload_modules():
+    from utils.extractor import import_youtube_dl
+    from utils.spotify import import_spotipy
+    import_youtube_dl()
+    import_spotipy()
+
+# Wait until no other process holds the standby lock; the lock is released when its holder exits
+async def acquire_standby_lock(path):
+    import fcntl
+    lock_file = open(path, "a")
+    while True:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return lock_file
+        except BlockingIOError:
+            await asyncio.sleep(bot_config.STANDBY_POLL_INTERVAL)
 
 # Set up database connection
 async def setup_database():
-    if database.DATABASE_TYPE == "postgres":
-        from database.models import db
-        db.init_app(bot)
-    elif database.DATABASE_TYPE == "mongodb":
-        from database.models import db
-        db.init_app(bot)
-    else:
+    if database.DATABASE_TYPE not in ("postgres", "mongodb"):
         print("Invalid database type. Please specify 'postgres' or 'mongodb' in .env.")
         await bot.close()
         return
 
-# Event handler for bot ready event
+    # Cogs reach saved playlists through bot.db, whichever backend is configured
+    from database.repository import create_repository
+    bot.db = create_repository()
+    await bot.db.init()
+
+# Event handler for bot ready event (also fired after reconnecting)
 @bot.event
 async def on_ready():
-    await load_cogs()
-    print(f"Logged in as {bot.user.name} (ID: {bot.user.id})")
+    global preload_task
+    if not startup.reported:
+        startup.mark("gateway")
+        startup.report()
+        if not bot_config.STANDBY_LOCK_PATH:
+            preload_task = asyncio.create_task(asyncio.to_thread(preload_modules))
+    print(f"Logged in as {bot.user.name} (ID: {bot.user.id}), running shards {sorted(bot.shards)} of {bot.shard_count}")
     print("------------------------------------")
 
+# Start the opt-in stall watchdog and sampling profiler on the running loop
+def start_diagnostics():
+    if bot_config.WATCHDOG_THRESHOLD > 0:
+        from utils.watchdog import LoopWatchdog
+        watchdog = LoopWatchdog(asyncio.get_running_loop(), bot_config.WATCHDOG_THRESHOLD)
+        watchdog.track_commands(bot)
+        watchdog.start()
+
+    if bot_config.PROFILER_PATH:
+        from utils.watchdog import SamplingProfiler
+        SamplingProfiler(bot_config.PROFILER_PATH, bot_config.PROFILER_INTERVAL, bot_config.PROFILER_DUMP_INTERVAL).start()
+
 # Run the bot
 async def main():
+    startup.mark("imports")
+    start_diagnostics()
     await setup_database()
-    await bot.start(secrets.DISCORD_BOT_TOKEN)
+    startup.mark("database")
+    try:
+        await bot.login(secrets.DISCORD_BOT_TOKEN)
+
+        # A warm standby is fully started but stays off the gateway until the active process exits
+        if bot_config.STANDBY_LOCK_PATH:
+            await asyncio.to_thread(preload_modules)
+            startup.mark("preload")
+            print(f"Standing by for the lock on {bot_config.STANDBY_LOCK_PATH}")
+            waiting_since = time.perf_counter()
+            bot.standby_lock = await acquire_standby_lock(bot_config.STANDBY_LOCK_PATH)
+            print(f"Taking over after standing by for {time.perf_counter() - waiting_since:.1f}s")
+            startup.skip()
+
+        await bot.connect(reconnect=True)
+    finally:
+        if getattr(bot, "db", None) is not None:
+            await bot.db.close()
 
 if __name__ == '__main__':
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,76 @@
+import threading
+from collections import deque
+
+import discord
+
+class PrebufferedAudio(discord.AudioSource):
+    """Wraps a PCM audio source and reads its first frames ahead of playback.
+
+    A background thread pulls up to `frames` 20 ms frames from the wrapped
+    source as soon as it is created, so the stream is already connected and
+    buffered by the time the voice client starts reading it. Cleaning up
+    while the thread is still reading leaves closing the wrapped source to
+    the thread, so the source is never closed under a read.
+    """
+
+    def __init__(self, original, frames):
+        self.original = original
+        self._frames = deque()
+        self._filled = threading.Condition()
+        self._filling = True
+        self._stopped = False
+        self._thread = threading.Thread(target=self._fill, args=(frames,), name="prebuffer", daemon=True)
+        self._thread.start()
+
+    def _fill(self, count):
+        try:
+            for _ in range(count):
+                if self._stopped:
+                    break
+                frame = self.original.read()
+                if not frame:
+                    break
+                with self._filled:
+                    self._frames.append(frame)
+                    self._filled.notify()
+        except Exception as e:
+            if not self._stopped:
+                print(f"Error pre-buffering song: {e}")
+        finally:
+            with self._filled:
+                self._filling = False
+                self._filled.notify()
+                stopped = self._stopped
+            if stopped:
+                self.original.cleanup()
+
+    def read(self):
+        with self._filled:
+            while not self._frames and self._filling:
+                self._filled.wait()
+            if self._frames:
+                return self._frames.popleft()
+        return self.original.read()
+
+    def is_opus(self):
+        return False
+
+    def cleanup(self):
+        with self._filled:
+            self._stopped = True
+            self._frames.clear()
+            filling = self._filling
+        if not filling:
+            self.original.cleanup()
+
+class CachedOpusAudio(discord.FFmpegOpusAudio):
+    """Plays an Opus file from the local audio cache without re-encoding it.
+
+    FFmpeg reads the file itself and copies its Opus packets into the Ogg
+    stream the voice client sends, so nothing is decoded or encoded. The
+    packets bypass the DSP stage, so this is only used while a guild's
+    settings leave the audio untouched (see `DSPSettings.is_passthrough`).
+    """
+
+    def __init__(self, path, before_options=None, options=None):
+        super().__init__(path, codec="copy", before_options=before_options, options=options)
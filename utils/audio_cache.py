@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+
+from config import music
+from utils.cache import TTLCache
+
+class AudioCache:
+    """A byte-bounded, content-addressed cache of tracks transcoded to Opus on local disk.
+
+    Files are named after a hash of the track's source ID (see
+    `utils.resolver.canonical_id`), so the same track is stored once whichever
+    URL it was queued from. A track is only admitted after it has been played
+    `admit_after` times, which keeps one-off plays from flushing popular
+    tracks; once the budget is exceeded the least recently played files are
+    evicted.
+
+    Nothing on disk is touched until `load` is called: a warm standby may
+    share the directory with the process it is about to replace.
+
+    Args:
+        path (str): The cache directory.
+        max_bytes (int): The disk budget for cached files.
+        admit_after (int): The number of plays after which a track is transcoded into the cache.
+    """
+
+    def __init__(self, path, max_bytes, admit_after):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.admit_after = admit_after
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._files = OrderedDict()  # digest -> file size, least recently played first
+        self._plays = TTLCache(max_size=100000, ttl=7 * 24 * 60 * 60)  # Play counts of tracks not cached yet
+        self._transcoding = {}  # digest -> task writing its file
+        self._slots = asyncio.Semaphore(music.AUDIO_CACHE_TRANSCODES)
+        self.loaded = False
+
+    def load(self):
+        """Indexes the cache directory and starts admitting tracks."""
+        self._scan()
+        self.loaded = True
+
+    def _scan(self):
+        """Indexes the files left by a previous run, oldest access first."""
+        os.makedirs(self.path, exist_ok=True)
+        found = []
+        for shard in os.scandir(self.path):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".part"):
+                    os.remove(entry.path)  # Interrupted transcode
+                elif entry.name.endswith(".opus"):
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, entry.name[:-len(".opus")], stat.st_size))
+
+        for _, digest, size in sorted(found):
+            self._files[digest] = size
+            self.size += size
+        self._evict()
+
+    def _file(self, digest):
+        return os.path.join(self.path, digest[:2], f"{digest}.opus")
+
+    def lookup(self, source_id):
+        """Returns the cached Opus file for a track, or None if it is not cached."""
+        digest = hashlib.sha256(source_id.encode()).hexdigest()
+        if digest not in self._files:
+            self.misses += 1
+            return None
+
+        self._files.move_to_end(digest)
+        self.hits += 1
+        path = self._file(digest)
+        try:
+            os.utime(path)  # Keeps the LRU order across restarts
+        except FileNotFoundError:
+            self.size -= self._files.pop(digest)
+            return None
+        return path
+
+    def record_play(self, source_id, stream_url):
+        """Counts a play of an uncached track, transcoding it in the background once it is admitted."""
+        if not self.loaded:
+            return
+        digest = hashlib.sha256(source_id.encode()).hexdigest()
+        if digest in self._files or digest in self._transcoding:
+            return
+
+        plays = (self._plays.get(digest, count=False) or 0) + 1
+        if plays < self.admit_after:
+            self._plays.set(digest, plays)
+            return
+
+        self._plays.pop(digest)
+        task = self._transcoding[digest] = asyncio.create_task(self._transcode(digest, stream_url))
+        task.add_done_callback(lambda _: self._transcoding.pop(digest, None))
+
+    async def _transcode(self, digest, stream_url):
+        path = self._file(digest)
+        partial = path + ".part"
+        async with self._slots:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                process = await asyncio.create_subprocess_exec(
+                    "ffmpeg", "-nostdin", "-loglevel", "error", *music.FFMPEG_BEFORE_OPTIONS.split(), "-i", stream_url,
+                    "-vn", "-c:a", "libopus", "-b:a", music.AUDIO_CACHE_BITRATE, "-f", "opus", "-y", partial,
+                    stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+                )
+                try:
+                    _, stderr = await process.communicate()
+                except asyncio.CancelledError:
+                    process.kill()
+                    await process.wait()
+                    raise
+                if process.returncode != 0:
+                    raise RuntimeError(stderr.decode(errors="replace").strip() or f"ffmpeg exited with {process.returncode}")
+
+                os.replace(partial, path)
+                self._files[digest] = os.path.getsize(path)
+                self.size += self._files[digest]
+                self._evict()
+
+            except Exception as e:
+                print(f"Error caching audio: {e}")
+
+            finally:
+                if os.path.exists(partial):
+                    os.remove(partial)
+
+    def _evict(self):
+        while self.size > self.max_bytes and self._files:
+            digest, size = self._files.popitem(last=False)
+            self.size -= size
+            try:
+                os.remove(self._file(digest))
+            except FileNotFoundError:
+                pass
+
+    @property
+    def hit_ratio(self):
+        """The share of plays served from the cache, between 0 and 1."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def close(self):
+        """Cancels transcodes that are still running."""
+        for task in self._transcoding.values():
+            task.cancel()
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """An in-memory LRU cache whose entries also expire after a time-to-live.
+
+    Args:
+        max_size (int): The maximum number of entries kept before the least recently used one is evicted.
+        ttl (float): The default lifetime of an entry, in seconds.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key, count=False) is not None
+
+    def get(self, key, count=True):
+        """Returns the cached value for `key`, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.time():
+            del self._entries[key]
+            entry = None
+
+        if entry is None:
+            if count:
+                self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        if count:
+            self.hits += 1
+        return entry[1]
+
+    def set(self, key, value, ttl=None):
+        """Caches `value` under `key` for `ttl` seconds (defaults to the cache's TTL)."""
+        self.set_until(key, value, time.time() + (self.ttl if ttl is None else ttl))
+
+    def set_until(self, key, value, expires_at):
+        """Caches `value` under `key` until the `expires_at` wall-clock timestamp."""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, key):
+        """Removes `key` from the cache, returning its value if it was present."""
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry is not None else None
+
+    def clear(self):
+        self._entries.clear()
+
+    @property
+    def hit_ratio(self):
+        """The share of lookups served from the cache, between 0 and 1."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+class SQLiteCache:
+    """A size-bounded key/value cache stored in a local SQLite file.
+
+    Values must be JSON serializable. All methods are blocking; call them from a worker thread.
+
+    Args:
+        path (str): The SQLite database file.
+        max_size (int): The maximum number of rows kept before the least recently used ones are evicted.
+    """
+
+    def __init__(self, path, max_size):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+            self._db.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+
+    def get(self, key):
+        """Returns `(value, expires_at)` for `key`, or None if it is missing or expired."""
+        now = time.time()
+        with self._lock, self._db:
+            row = self._db.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            self._db.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, expires_at):
+        """Stores `value` under `key` until the `expires_at` wall-clock timestamp."""
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, time.time()),
+            )
+            self._db.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "SELECT key FROM cache ORDER BY accessed_at LIMIT max(0, (SELECT COUNT(*) FROM cache) - ?))",
+                (self.max_size,),
+            )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+class TieredCache:
+    """An in-memory `TTLCache` backed by an optional on-disk `SQLiteCache`.
+
+    Disk hits are promoted to memory with their original expiry, so a restarted
+    process starts warm without serving entries past their lifetime.
+    """
+
+    def __init__(self, memory, disk=None):
+        self.memory = memory
+        self.disk = disk
+
+    async def get(self, key):
+        value = self.memory.get(key)
+        if value is not None or self.disk is None:
+            return value
+
+        entry = await asyncio.to_thread(self.disk.get, key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        self.memory.set_until(key, value, expires_at)
+        return value
+
+    async def set(self, key, value, ttl=None):
+        expires_at = time.time() + (self.memory.ttl if ttl is None else ttl)
+        self.memory.set_until(key, value, expires_at)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value, expires_at)
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
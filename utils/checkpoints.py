@@ -0,0 +1,52 @@
+from utils.session_store import encode_songs
+
+class Checkpointer:
+    """Writes coalesced checkpoints of active players to a `SessionStore`.
+
+    Each `flush` writes every change since the previous one in a single
+    transaction. A player's songs are only serialized again when its current
+    song or queue changed; otherwise just its position and volume are
+    updated, and players that are paused or idle are not written at all.
+    Players that went away have their checkpoints deleted.
+
+    Args:
+        store (SessionStore): Where the checkpoints are kept.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._written = {}  # guild_id -> (songs key, position, volume) as last written
+
+    def adopt(self, guild_id):
+        """Takes over a checkpoint left by a previous process, so the next flush rewrites or deletes it."""
+        self._written[guild_id] = (None, None, None)
+
+    async def flush(self, players):
+        """Checkpoints `players`, a mapping of guild IDs to their `MusicPlayer`."""
+        checkpoints, positions, written_now = [], [], {}
+        for guild_id, player in players.items():
+            if player.current_song is None and not player.queue:
+                continue  # Nothing to resume; dropped below like a player that went away
+
+            channel = player.vc.channel if player.vc and player.vc.is_connected() else player.voice_channel
+            key = (channel.id, player.current_song, player.queue.version)
+            position, volume = round(player.position(), 1), player.volume
+
+            written = self._written.get(guild_id)
+            if written is None or written[0] != key:
+                checkpoints.append((guild_id, channel.id, encode_songs(player.snapshot()), position, volume))
+            elif written[1:] != (position, volume):
+                positions.append((guild_id, position, volume))
+            else:
+                continue
+            written_now[guild_id] = (key, position, volume)
+
+        removed = [guild_id for guild_id in self._written if guild_id not in players or (
+            players[guild_id].current_song is None and not players[guild_id].queue)]
+
+        if checkpoints or positions or removed:
+            await self.store.save_checkpoints(checkpoints, positions, removed)
+        # Only recorded once written, so that a failed write is retried in full by the next flush
+        self._written.update(written_now)
+        for guild_id in removed:
+            del self._written[guild_id]
@@ -0,0 +1,211 @@
+import threading
+
+import discord
+import numpy as np
+
+SAMPLE_RATE = 48000
+FRAME_SAMPLES = 960  # Samples per channel in a 20 ms frame
+FRAME_SIZE = FRAME_SAMPLES * 2 * 2  # Bytes of 16-bit stereo PCM per frame
+EQ_TAPS = 129
+NORMALIZE_TARGET_RMS = 3000.0  # About -21 dBFS
+NORMALIZE_MAX_GAIN = 4.0
+
+def _lowpass(cutoff):
+    n = np.arange(EQ_TAPS) - (EQ_TAPS - 1) / 2
+    taps = np.sinc(2 * cutoff / SAMPLE_RATE * n) * np.hamming(EQ_TAPS)
+    return taps / taps.sum()
+
+def design_eq(bass_db, treble_db):
+    """Designs a linear-phase FIR filter boosting or cutting bass (below ~250 Hz) and treble (above ~4 kHz).
+
+    Args:
+        bass_db (float): The bass gain, in dB.
+        treble_db (float): The treble gain, in dB.
+
+    Returns:
+        numpy.ndarray: The filter taps, or None if both gains are 0 dB.
+    """
+    if bass_db == 0 and treble_db == 0:
+        return None
+    identity = np.zeros(EQ_TAPS)
+    identity[(EQ_TAPS - 1) // 2] = 1.0
+    bass_gain, treble_gain = 10 ** (bass_db / 20), 10 ** (treble_db / 20)
+    taps = identity + (bass_gain - 1) * _lowpass(250) + (treble_gain - 1) * (identity - _lowpass(4000))
+    return taps.astype(np.float32)
+
+class DSPSettings:
+    """A guild's audio effect settings, shared by every track it plays.
+
+    Changes take effect on the next 20 ms frame: volume changes are ramped
+    over `ramp_ms`, and the equalizer filter is designed once per change
+    rather than per frame.
+    """
+
+    def __init__(self, volume=0.5, ramp_ms=100, crossfade=0.0, normalize=False):
+        self.volume = volume
+        self.ramp_ms = ramp_ms
+        self.crossfade = crossfade  # Seconds of overlap between tracks; 0 disables crossfading
+        self.normalize = normalize
+        self.bass = 0.0
+        self.treble = 0.0
+        self.eq_taps = None
+
+    def set_eq(self, bass_db, treble_db):
+        self.bass, self.treble = bass_db, treble_db
+        self.eq_taps = design_eq(bass_db, treble_db)
+
+    def is_passthrough(self):
+        """Returns whether the settings leave the audio unchanged, so it need not be decoded at all."""
+        return self.volume == 1.0 and self.eq_taps is None and not self.normalize and not self.crossfade
+
+class DSPAudio(discord.AudioSource):
+    """Applies a guild's `DSPSettings` to a PCM source, and crossfades into the next track.
+
+    Frames are processed as NumPy arrays in preallocated buffers, so the
+    cost per frame does not depend on how often the settings change. When
+    the track is `crossfade` seconds from its end, `on_near_end` is called
+    (from the voice thread); the player answers with `attach_next`, and both
+    tracks are mixed with opposite gain ramps until the current one ends,
+    then the next track carries on in the same audio source.
+
+    Args:
+        source (discord.AudioSource): The PCM source of the track.
+        settings (DSPSettings): The guild's settings.
+        duration (float, optional): The track length in seconds, needed for crossfading.
+        on_near_end (callable, optional): Called without arguments when the next track should be attached.
+    """
+
+    def __init__(self, source, settings, duration=None, on_near_end=None):
+        self.source = source
+        self.settings = settings
+        self.on_near_end = on_near_end
+        self._lock = threading.Lock()
+        self._next = None
+        self._fade_frame = 0
+        self._fade_frames = 0
+        self._start_track(duration)
+
+        self._gain = settings.volume
+        self._level = NORMALIZE_TARGET_RMS
+        self._buffer = np.zeros((FRAME_SAMPLES, 2), dtype=np.float32)
+        self._mix = np.zeros((FRAME_SAMPLES, 2), dtype=np.float32)
+        self._ramp = np.linspace(0, 1, FRAME_SAMPLES, endpoint=False, dtype=np.float32)
+        self._gains = np.zeros(FRAME_SAMPLES, dtype=np.float32)
+        self._history = np.zeros((EQ_TAPS - 1, 2), dtype=np.float32)
+        self._padded = np.zeros((EQ_TAPS - 1 + FRAME_SAMPLES, 2), dtype=np.float32)
+        self._output = np.zeros((FRAME_SAMPLES, 2), dtype=np.int16)
+
+    def _start_track(self, duration):
+        self._frames_left = int(duration * 50) if duration else None
+        self._near_end_sent = False
+
+    def attach_next(self, source, duration=None):
+        """Starts crossfading into `source`."""
+        with self._lock:
+            if self._next is not None:
+                self._next[0].cleanup()
+            fade_frames = max(1, int(self.settings.crossfade * 50))
+            if self._frames_left is not None:
+                fade_frames = max(1, min(fade_frames, self._frames_left))
+            self._next = (source, duration)
+            self._fade_frame, self._fade_frames = 0, fade_frames
+
+    def _switch(self):
+        source, duration = self._next
+        self._next = None
+        self.source.cleanup()
+        self.source = source
+        self._start_track(duration)
+        if self._frames_left is not None:
+            self._frames_left -= self._fade_frame  # Already read while fading in
+        self._fade_frame = 0
+
+    def read(self):
+        with self._lock:
+            frame = self.source.read()
+            if len(frame) != FRAME_SIZE:
+                if self._next is None:
+                    return b""
+                self._switch()  # The track ended before its fade did
+                frame = self.source.read()
+                if len(frame) != FRAME_SIZE:
+                    return b""
+
+            buffer = self._buffer
+            np.copyto(buffer, np.frombuffer(frame, dtype=np.int16).reshape(FRAME_SAMPLES, 2))
+
+            if self._next is not None:
+                self._crossfade(buffer)
+            elif self._frames_left is not None:
+                self._frames_left -= 1
+                if (not self._near_end_sent and self.on_near_end is not None and self.settings.crossfade > 0
+                        and self._frames_left <= self.settings.crossfade * 50):
+                    self._near_end_sent = True
+                    self.on_near_end()
+
+            if self.settings.eq_taps is not None:
+                self._equalize(buffer, self.settings.eq_taps)
+            self._apply_gain(buffer)
+
+            np.clip(buffer, -32768, 32767, out=buffer)
+            np.copyto(self._output, buffer, casting="unsafe")
+            return self._output.tobytes()
+
+    def _crossfade(self, buffer):
+        """Mixes in the next track's frame, fading the current track out and the next one in."""
+        start, end = self._fade_frame / self._fade_frames, (self._fade_frame + 1) / self._fade_frames
+        next_frame = self._next[0].read()
+        self._fade_frame += 1
+
+        np.multiply(self._ramp, end - start, out=self._gains)
+        self._gains += start  # Fade-in gains across this frame
+        if len(next_frame) == FRAME_SIZE:
+            np.copyto(self._mix, np.frombuffer(next_frame, dtype=np.int16).reshape(FRAME_SAMPLES, 2))
+            self._mix *= self._gains[:, None]
+        else:
+            self._mix.fill(0)
+        np.subtract(1, self._gains, out=self._gains)
+        buffer *= self._gains[:, None]
+        buffer += self._mix
+
+        if self._fade_frame >= self._fade_frames:
+            self._switch()
+
+    def _equalize(self, buffer, taps):
+        """Filters both channels with the equalizer taps, carrying filter state across frames."""
+        history = EQ_TAPS - 1
+        self._padded[:history] = self._history
+        self._padded[history:] = buffer
+        for channel in range(2):
+            buffer[:, channel] = np.convolve(self._padded[:, channel], taps, mode="valid")
+        self._history[:] = self._padded[-history:]
+
+    def _apply_gain(self, buffer):
+        target = self.settings.volume
+        if self.settings.normalize:
+            rms = float(np.sqrt(np.vdot(buffer, buffer) / buffer.size))
+            self._level = 0.9 * self._level + 0.1 * rms
+            target *= min(NORMALIZE_MAX_GAIN, NORMALIZE_TARGET_RMS / max(self._level, 1.0))
+
+        gain = self._gain
+        if gain == target:
+            buffer *= gain
+            return
+
+        # Move towards the target at a rate that covers the full range in `ramp_ms`, interpolating across the frame
+        step = 20 / max(self.settings.ramp_ms, 20)
+        new_gain = min(target, gain + step) if target > gain else max(target, gain - step)
+        np.multiply(self._ramp, new_gain - gain, out=self._gains)
+        self._gains += gain
+        buffer *= self._gains[:, None]
+        self._gain = new_gain
+
+    def is_opus(self):
+        return False
+
+    def cleanup(self):
+        with self._lock:
+            self.source.cleanup()
+            if self._next is not None:
+                self._next[0].cleanup()
+                self._next = None
@@ -0,0 +1,112 @@
+import asyncio
+import importlib
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from config import music
+from utils import metrics
+
+youtube_dl = None  # Imported on first use by import_youtube_dl(), as it is slow to import
+
+class ExtractorBusy(Exception):
+    """Raised when the extraction backlog is full."""
+
+def import_youtube_dl():
+    """Imports youtube_dl if it is not imported yet, and returns it."""
+    global youtube_dl
+    if youtube_dl is None:
+        module = importlib.import_module("youtube_dl")
+        module.utils.bug_reports_message = lambda: ''  # Suppress noisy yt-dlp logging
+        youtube_dl = module
+    return youtube_dl
+
+def _extract_info(url, ydl_opts):
+    """Runs a blocking youtube_dl extraction. Executed on a worker thread."""
+    with import_youtube_dl().YoutubeDL(ydl_opts) as ydl:
+        return ydl.extract_info(url, download=False)
+
+class Extractor:
+    """Runs youtube_dl extractions on a bounded worker pool.
+
+    Pending jobs are kept in one FIFO per guild and dispatched round-robin, so a
+    guild that queues many extractions cannot starve the others. Once
+    `max_pending` jobs are waiting, new requests fail fast with `ExtractorBusy`.
+    """
+
+    def __init__(self, max_workers=music.EXTRACTOR_WORKERS, max_pending=music.EXTRACTOR_MAX_PENDING):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="extractor")
+        self._pending = OrderedDict()  # guild_id -> deque of (future, url, ydl_opts)
+        self._pending_count = 0
+        self._running = 0
+
+    @property
+    def pending(self):
+        """The number of extractions waiting for a worker."""
+        return self._pending_count
+
+    async def extract(self, guild_id, url, ydl_opts=None):
+        """Extracts info for `url` without blocking the event loop.
+
+        Args:
+            guild_id (int): The guild the extraction is made for, used for fair scheduling.
+            url (str): The URL to extract.
+            ydl_opts (dict, optional): Options passed to `youtube_dl.YoutubeDL`.
+
+        Returns:
+            dict: The extracted info.
+
+        Raises:
+            ExtractorBusy: If the extraction backlog is full.
+        """
+        if self._pending_count >= self.max_pending:
+            raise ExtractorBusy()
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(guild_id, deque()).append((future, url, ydl_opts or {}))
+        self._pending_count += 1
+        self._dispatch()
+        return await future
+
+    def _dispatch(self):
+        """Starts pending jobs while workers are free, one guild at a time."""
+        loop = asyncio.get_running_loop()
+        while self._running < self.max_workers and self._pending:
+            guild_id, jobs = next(iter(self._pending.items()))
+            future, url, ydl_opts = jobs.popleft()
+            if jobs:
+                self._pending.move_to_end(guild_id)
+            else:
+                del self._pending[guild_id]
+            self._pending_count -= 1
+
+            if future.cancelled():
+                continue
+
+            self._running += 1
+            job = loop.run_in_executor(self._executor, _extract_info, url, ydl_opts)
+            started = time.perf_counter()
+            job.add_done_callback(lambda job, future=future, started=started: self._on_done(job, future, started))
+
+    def _on_done(self, job, future, started):
+        self._running -= 1
+        metrics.EXTRACTION_SECONDS.observe(time.perf_counter() - started)
+        if job.cancelled():
+            future.cancel()
+        elif not future.cancelled():
+            if job.exception() is not None:
+                future.set_exception(job.exception())
+            else:
+                future.set_result(job.result())
+        self._dispatch()
+
+    def shutdown(self):
+        """Cancels pending jobs and stops the worker pool."""
+        for jobs in self._pending.values():
+            for future, _, _ in jobs:
+                future.cancel()
+        self._pending.clear()
+        self._pending_count = 0
+        self._executor.shutdown(wait=False, cancel_futures=True)
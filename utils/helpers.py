@@ -1,5 +1,7 @@
 import discord
 
+from utils.lookup import parse_user_id
+
 def create_embed(title, description, fields=None):
     """Creates a Discord embed object with the given title, description, and optional fields.
 
@@ -32,39 +34,54 @@ def format_timestamp(timestamp):
     """
     return timestamp.strftime('%Y-%m-%d %H:%M:%S')
 
-def get_user_from_mention(mention):
-    """Gets a user object from a mention in a message.
+def format_duration(seconds):
+    """Formats a track length as `m:ss`, or `h:mm:ss` for an hour or more.
+
+    Args:
+        seconds (float): The length in seconds, or None if it is unknown (e.g. a live stream).
+
+    Returns:
+        str: The formatted length, or "live" if it is unknown.
+    """
+    if not seconds:
+        return "live"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}" if hours else f"{minutes}:{seconds:02}"
+
+def get_user_from_mention(guild, mention):
+    """Gets a cached member of a guild from a user mention or ID.
 
     Args:
-        mention (str): The mention string.
+        guild (discord.Guild): The guild the member belongs to.
+        mention (str): The mention string, e.g. `<@1234...>` or `<@!1234...>`.
 
     Returns:
-        discord.Member: The user object, or None if the mention is invalid.
+        discord.Member: The member object, or None if the mention is invalid or the member is not cached.
     """
-    try:
-        user_id = int(mention.replace("<@!", "").replace(">", ""))
-        return discord.utils.get(mention.guild.members, id=user_id)
-    except ValueError:
-        return None
+    user_id = parse_user_id(mention)
+    return guild.get_member(user_id) if user_id is not None else None
 
-def get_user_from_id(user_id):
-    """Gets a user object from a user ID.
+def get_user_from_id(guild, user_id):
+    """Gets a cached member of a guild from a user ID.
 
     Args:
+        guild (discord.Guild): The guild the member belongs to.
         user_id (int): The user ID.
 
     Returns:
-        discord.Member: The user object, or None if the user is not found.
+        discord.Member: The member object, or None if the member is not cached.
     """
-    return discord.utils.get(mention.guild.members, id=user_id)
+    return guild.get_member(user_id)
 
-def get_server_from_id(server_id):
+def get_server_from_id(bot, server_id):
     """Gets a server object from a server ID.
 
     Args:
+        bot (discord.Client): The bot whose servers are searched.
         server_id (int): The server ID.
 
     Returns:
         discord.Guild: The server object, or None if the server is not found.
     """
-    return discord.utils.get(bot.guilds, id=server_id)
\ No newline at end of file
+    return bot.get_guild(server_id)
@@ -0,0 +1,123 @@
+import re
+
+import discord
+from discord.ext import commands
+
+from config import bot as bot_config
+from utils.cache import TTLCache
+
+# Matches user (<@id>, <@!id>), role (<@&id>) and channel (<#id>) mentions
+MENTION_PATTERN = re.compile(r"<(@!?|@&|#)([0-9]{15,20})>")
+ID_PATTERN = re.compile(r"[0-9]{15,20}")
+
+_MENTION_KINDS = {"@": "user", "@!": "user", "@&": "role", "#": "channel"}
+
+def parse_mention(text):
+    """Parses a mention.
+
+    Args:
+        text (str): The text to parse, e.g. `<@!1234...>` or `<#1234...>`.
+
+    Returns:
+        tuple[str, int]: `("user" | "role" | "channel", id)`, or None if `text` is not a mention.
+    """
+    match = MENTION_PATTERN.fullmatch(text.strip())
+    if match is None:
+        return None
+    return _MENTION_KINDS[match.group(1)], int(match.group(2))
+
+def parse_user_id(text):
+    """Returns the user ID in a user mention or a raw ID, or None if `text` is neither."""
+    text = text.strip()
+    if ID_PATTERN.fullmatch(text):
+        return int(text)
+    mention = parse_mention(text)
+    return mention[1] if mention is not None and mention[0] == "user" else None
+
+class LookupService:
+    """Resolves guilds and members by ID without scanning member or guild lists.
+
+    Lookups hit the client's ID-keyed caches first. Members that are not
+    cached (the member cache only keeps members in voice channels unless
+    every intent is enabled) are fetched over HTTP, and the result, found or
+    not, is kept in a small TTL cache so repeated lookups don't hit the API.
+
+    Args:
+        bot (discord.Client): The bot whose caches are used.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._members = TTLCache(max_size=bot_config.LOOKUP_CACHE_SIZE, ttl=bot_config.LOOKUP_CACHE_TTL)
+
+    def get_guild(self, guild_id):
+        """Returns a cached guild, or None."""
+        return self.bot.get_guild(guild_id)
+
+    def get_member(self, guild, user_id):
+        """Returns a cached member of `guild`, or None."""
+        member = guild.get_member(user_id)
+        if member is None:
+            member = self._members.get((guild.id, user_id)) or None
+        return member
+
+    async def fetch_member(self, guild, user_id):
+        """Returns a member of `guild`, fetching it if it is not cached, or None if it does not exist."""
+        member = guild.get_member(user_id)
+        if member is not None:
+            return member
+
+        cached = self._members.get((guild.id, user_id))
+        if cached is not None:
+            return cached or None  # False marks a recent miss
+
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            member = None
+        self._members.set((guild.id, user_id), member or False)
+        return member
+
+    async def fetch_guild(self, guild_id):
+        """Returns a guild, fetching it if it is not cached, or None if the bot cannot see it."""
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            try:
+                guild = await self.bot.fetch_guild(guild_id)
+            except (discord.NotFound, discord.Forbidden):
+                return None
+        return guild
+
+    async def resolve_mention(self, guild, text):
+        """Returns the member, role or channel of `guild` that `text` mentions, or None."""
+        mention = parse_mention(text)
+        if mention is None:
+            return None
+
+        kind, object_id = mention
+        if kind == "user":
+            return await self.fetch_member(guild, object_id)
+        if kind == "role":
+            return guild.get_role(object_id)
+        return guild.get_channel_or_thread(object_id)
+
+    def forget(self, guild_id, user_id):
+        """Drops a fetched member, e.g. after it left the guild."""
+        self._members.pop((guild_id, user_id))
+
+class MemberLookup(commands.Converter):
+    """A `discord.Member` converter that resolves mentions and IDs through the bot's `LookupService`.
+
+    Names still go through discord.py's `MemberConverter`.
+    """
+
+    async def convert(self, ctx, argument):
+        lookup = getattr(ctx.bot, "lookup", None)
+        user_id = parse_user_id(argument)
+        if lookup is None or user_id is None or ctx.guild is None:
+            return await commands.MemberConverter().convert(ctx, argument)
+
+        member = await lookup.fetch_member(ctx.guild, user_id)
+        if member is None:
+            raise commands.MemberNotFound(argument)
+        return member
@@ -0,0 +1,201 @@
+import asyncio
+import math
+import time
+
+from aiohttp import web
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+def _format_value(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+class Metric:
+    """A named metric with optional labels, rendered in the Prometheus text format."""
+
+    kind = "untyped"
+
+    def __init__(self, name, help, labelnames=(), registry=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # label values -> value
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """Yields `(suffix, label values, extra labels, value)` for each sample."""
+        for key, value in list(self._values.items()):
+            yield "", key, (), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}")
+        return "\n".join(lines)
+
+class Counter(Metric):
+    """A value that only goes up, such as a number of errors."""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+class Gauge(Metric):
+    """A value that goes up and down. It can also be computed when it is collected, via `set_function`."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), registry=None):
+        super().__init__(name, help, labelnames, registry)
+        self._function = None
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+    def get(self, **labels):
+        if self._function is not None:
+            return self._function().get(self._key(labels), 0)
+        return self._values.get(self._key(labels), 0)
+
+    def set_function(self, function):
+        """Computes the gauge on collection; `function` returns a `{label values tuple: value}` dict."""
+        self._function = function
+
+    def samples(self):
+        if self._function is None:
+            yield from super().samples()
+            return
+        for key, value in self._function().items():
+            yield "", tuple(str(v) for v in key), (), value
+
+class Histogram(Metric):
+    """Counts observations (such as durations) in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        super().__init__(name, help, labelnames, registry)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]  # bucket counts, sum, count
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[0][i] += 1
+                break
+        state[1] += value
+        state[2] += 1
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def mean(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[1] / state[2] if state and state[2] else 0.0
+
+    def quantile(self, q, **labels):
+        """Estimates a quantile as the upper bound of the bucket it falls in."""
+        state = self._values.get(self._key(labels))
+        if not state or not state[2]:
+            return 0.0
+        rank = q * state[2]
+        seen = 0
+        for bound, count in zip(self.buckets, state[0]):
+            seen += count
+            if seen >= rank:
+                return bound
+        return math.inf
+
+    def label_values(self):
+        """Returns the label values that have observations."""
+        return list(self._values)
+
+    def samples(self):
+        for key, (counts, total, count) in list(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield "_bucket", key, (("le", _format_value(bound) if not math.isinf(bound) else "+Inf"),), cumulative
+            yield "_sum", key, (), total
+            yield "_count", key, (), count
+
+class Registry:
+    """A collection of metrics rendered together."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+
+    def render(self):
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+REGISTRY = Registry()
+
+# Commands
+COMMAND_LATENCY = Histogram("bot_command_latency_seconds", "Time taken to run a command.", ["command"])
+COMMAND_ERRORS = Counter("bot_command_errors_total", "Commands that raised an error.", ["command"])
+RATE_LIMITED = Counter("bot_rate_limited_total", "Command uses rejected by a rate limit.", ["scope"])
+
+# Playback pipeline
+EXTRACTION_SECONDS = Histogram("music_extraction_seconds", "Time taken by a youtube_dl extraction on a worker thread.")
+EXTRACTOR_PENDING = Gauge("music_extractor_pending", "Extractions waiting for a worker thread.")
+PREBUFFERED_STARTS = Counter("music_prebuffered_starts_total", "Songs that started from a pre-buffered source.")
+TRANSITION_GAP = Histogram("music_transition_gap_seconds", "Silence between the end of a song and the start of the next.")
+LAST_TRANSITION_GAP = Gauge("music_last_transition_gap_seconds", "The most recent transition gap of each active guild.", ["guild"])
+QUEUE_DEPTH = Gauge("music_queue_depth", "Songs waiting in each active guild's queue.", ["guild"])
+VOICE_CONNECTIONS = Gauge("bot_voice_connections", "Connected voice clients.")
+CACHE_HIT_RATIO = Gauge("bot_cache_hit_ratio", "Share of lookups served from each cache.", ["cache"])
+
+# Event loop
+LOOP_LAG = Histogram("bot_event_loop_lag_seconds", "How late the event loop ran a scheduled wake-up.",
+                     buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+LAST_LOOP_LAG = Gauge("bot_event_loop_last_lag_seconds", "The most recent event loop lag measurement.")
+
+async def monitor_loop_lag(interval):
+    """Measures how late the event loop wakes up from a sleep, forever."""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - started - interval)
+        LOOP_LAG.observe(lag)
+        LAST_LOOP_LAG.set(lag)
+
+async def start_server(host, port, registry=None):
+    """Serves the metrics at `http://host:port/metrics` for Prometheus to scrape.
+
+    Returns:
+        aiohttp.web.AppRunner: The runner, to be cleaned up on shutdown.
+    """
+    registry = registry or REGISTRY
+
+    async def handle_metrics(request):
+        return web.Response(body=registry.render().encode(), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
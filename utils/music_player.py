@@ -1,20 +1,41 @@
 import discord
 import asyncio
-import youtube_dl
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
-from pydub import AudioSegment
-from pydub.playback import play
+import time
+
+from config import music
+from utils import metrics
+from utils.audio import CachedOpusAudio, PrebufferedAudio
+from utils.dsp import DSPAudio, DSPSettings
+from utils.extractor import ExtractorBusy
+from utils.track_queue import Track, TrackQueue
 
 class MusicPlayer:
-    def __init__(self, voice_channel):
+    def __init__(self, voice_channel, resolver, audio_cache=None, voice_workers=None):
         self.voice_channel = voice_channel
+        self.resolver = resolver
+        self.audio_cache = audio_cache
+        self.voice_workers = voice_workers  # Optional pool that decodes and encodes audio in other processes
         self.vc = None
-        self.queue = []
+        self.queue = TrackQueue()
         self.current_song = None
         self.is_playing = False
         self.is_paused = False
         self.volume = 0.5
+        self.dsp = DSPSettings(self.volume, ramp_ms=music.VOLUME_RAMP_MS, crossfade=music.CROSSFADE_SECONDS, normalize=music.NORMALIZE)
+        self._crossfade_from = None  # Audio source waiting for the next song to crossfade into
+        self._prefetch_tasks = {}  # url -> task resolving an upcoming song
+        self._prebuffered = {}  # url -> source already streaming the next song
+        self._commands = asyncio.Queue()  # Messages for the playback loop
+        self._task = None  # The playback loop
+        self._loading = None  # Task preparing the song about to play
+        self._closed = False
+        self.last_active = time.monotonic()
+        self.empty_since = None  # When the reaper first saw the voice channel without listeners
+        self.last_transition_gap = None  # Seconds of silence before the current song started
+        self._song_ended_at = None
+        self._seek = None  # (song, offset) to start a restored song from
+        self._position = 0.0  # Seconds of the current song played before `_playing_since`
+        self._playing_since = None
 
     async def connect(self):
         """Connects the bot to the voice channel."""
@@ -27,88 +48,419 @@ class MusicPlayer:
 
     async def add_song(self, url, song_title):
         """Adds a song to the queue."""
-        self.queue.append((url, song_title))
+        self.queue.append(Track(url, song_title))
+        self._prefetch()
+        self._post("play")
+
+    async def add_songs(self, tracks):
+        """Adds many songs (e.g. a whole playlist) to the queue at once."""
+        self.queue.extend(tracks)
+        self._prefetch()
+        self._post("play")
+
+    async def resume_session(self, songs, position):
+        """Queues the songs of a restored session, starting the first one `position` seconds in."""
+        if songs and position > 0:
+            self._seek = (songs[0], position)
+        await self.add_songs(songs)
+
+    async def remove_song(self, index):
+        """Removes and returns the song at `index` in the queue."""
+        song = self.queue.remove(index)
+        self._prefetch()
+        return song
+
+    async def move_song(self, source, destination):
+        """Moves the song at `source` in the queue to `destination`."""
+        song = self.queue.move(source, destination)
+        self._prefetch()
+        return song
+
+    async def shuffle(self):
+        """Shuffles the queue."""
+        self.queue.shuffle()
+        self._prefetch()
+
+    def idle_seconds(self):
+        """Returns how long the player has been neither playing nor loading a song."""
+        if self.is_playing or self._loading is not None:
+            return 0
+        return time.monotonic() - self.last_active
+
+    def listener_count(self):
+        """Returns the number of non-bot members in the player's voice channel."""
+        channel = self.vc.channel if self.vc and self.vc.is_connected() else self.voice_channel
+        return sum(1 for member in channel.members if not member.bot)
+
+    def position(self):
+        """Returns how many seconds of the current song have been played."""
+        if self._playing_since is None:
+            return self._position
+        return self._position + time.monotonic() - self._playing_since
+
+    def snapshot(self):
+        """Returns the songs to restore if the player is evicted, current song first."""
+        songs = [self.current_song] if self.current_song else []
+        songs.extend(self.queue)
+        return songs
+
+    async def _run(self):
+        """The guild's playback loop.
 
-    async def play_next(self):
-        """Plays the next song in the queue."""
+        Every playback state change happens here, in response to messages from
+        commands, the queue and the voice thread, so only one song can ever be
+        starting or playing at a time and no call chain grows between songs.
+        """
+        while True:
+            command, args, done = await self._commands.get()
+            self.last_active = time.monotonic()
+            try:
+                if command == "close":
+                    self._closed = True
+                    await self._handle_stop()
+                    break
+                await getattr(self, f"_handle_{command}")(*args)
+            except Exception as e:
+                print(f"Error handling {command} command: {e}")
+            finally:
+                if done is not None and not done.done():
+                    done.set_result(None)
+
+    def _post(self, command, *args):
+        """Delivers a message to the playback loop, starting the loop if needed."""
+        if self._closed:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name=f"music-player-{self.voice_channel.guild.id}")
+        self._commands.put_nowait((command, args, None))
+
+    async def _call(self, command, *args):
+        """Delivers a message to the playback loop and waits until it has been handled."""
+        done = asyncio.get_running_loop().create_future()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name=f"music-player-{self.voice_channel.guild.id}")
+        self._commands.put_nowait((command, args, done))
+        await done
+
+    async def _handle_play(self):
+        if not self.is_playing and not self.is_paused and self._loading is None:
+            self._load_next()
+
+    def _load_next(self):
+        """Starts loading the song at the head of the queue, if any."""
         if len(self.queue) > 0:
-            self.current_song = self.queue.pop(0)
-            url, song_title = self.current_song
-            
+            self.current_song = song = self.queue.popleft()
+            # Taken before `_prefetch`, which would otherwise discard them as no longer upcoming
+            source = self._prebuffered.pop(song.url, None)
+            pending = self._prefetch_tasks.pop(song.url, None)
+            self._loading = asyncio.create_task(self._load(song, source, pending), name=f"music-load-{self.voice_channel.guild.id}")
+            self._loading.add_done_callback(self._on_loaded)
+            if source is not None:
+                # A load cancelled before it starts never reaches its own cleanup
+                self._loading.add_done_callback(lambda task: task.cancelled() and source.cleanup())
+            self._prefetch()
+        else:
+            self.current_song = None
+
+    async def _load(self, song, source=None, pending=None):
+        """Resolves a song and prepares its audio source. Runs beside the playback loop.
+
+        Args:
+            song (Track): The song to load.
+            source (discord.AudioSource, optional): The song's pre-buffered source, if it has one.
+            pending (asyncio.Task, optional): The song's in-flight prefetch, if any.
+        """
+        offset = 0
+        if self._seek is not None and self._seek[0] is song:
+            offset, self._seek = self._seek[1], None
+            if source is not None:
+                source.cleanup()  # Pre-buffered from the start of the song
+                source = None
+        if isinstance(source, CachedOpusAudio) and not self.dsp.is_passthrough():
+            source.cleanup()  # Opened for copying before an effect was turned on
+            source = None
+        try:
+            if pending is not None:
+                # Let an in-flight prefetch finish so its result lands in the resolver cache
+                await asyncio.wait([pending])
+
+            # Resolve the stream URL (Spotify tracks resolve to their audio preview)
+            track = await self._resolve_waiting(song.url)
+            if track['stream_url'] is None:
+                print("No audio preview available for this Spotify track.")
+                return None
+
+            if source is None:
+                source = self._create_source(track, offset)
+            else:
+                metrics.PREBUFFERED_STARTS.inc()
+            if self.audio_cache is not None:
+                self.audio_cache.record_play(track['id'], track['stream_url'])
+
+            if self.vc is None or not self.vc.is_connected():
+                await self.connect()
+            return source, track['duration'], offset
+
+        except BaseException:
+            if source is not None:
+                source.cleanup()
+            raise
+
+    async def _resolve_waiting(self, url):
+        """Resolves `url`, waiting for room while the extraction backlog is full.
+
+        The song is about to play, so it is not dropped like a command's lookup
+        would be; failing fast would instead pop and lose the rest of the queue.
+        """
+        delay = music.EXTRACTOR_BUSY_RETRY
+        while True:
             try:
-                # Check if the song is a Spotify URL 
-                if "spotify.com" in url:
-                    # Get the track's audio preview URL using spotipy
-                    track_id = url.split("/")[-1]
-                    track_info = spotipy.Spotify(client_credentials_manager=SpotifyClientCredentials()).track(track_id)
-                    audio_preview_url = track_info['preview_url']
-
-                    # Download and play the audio preview 
-                    if audio_preview_url is not None:
-                        ydl_opts = {'format': 'bestaudio'}
-                        with youtube_dl.YoutubeDL(ydl_opts) as ydl:
-                            info = ydl.extract_info(audio_preview_url, download=False)
-                            url = info['formats'][0]['url']
-                            audio = AudioSegment.from_file(url, format="mp3")
-                            play(audio)
-                            self.is_playing = True
-                        await asyncio.sleep(audio.duration_seconds)
-                        self.is_playing = False
-                    else:
-                        print("No audio preview available for this Spotify track.")
-                        await self.play_next()  # Play the next song in the queue
-
-                else:
-                    # Play from YouTube
-                    ydl_opts = {'format': 'bestaudio'}
-                    with youtube_dl.YoutubeDL(ydl_opts) as ydl:
-                        info = ydl.extract_info(url, download=False)
-                        url = info['formats'][0]['url']
-                        audio = AudioSegment.from_file(url, format="mp3")
-                        play(audio)
-                        self.is_playing = True
-                    await asyncio.sleep(audio.duration_seconds)
-                    self.is_playing = False
-
-                await self.play_next()  # Play the next song in the queue
+                return await self.resolver.resolve(self.voice_channel.guild.id, url)
+            except ExtractorBusy:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5.0)
 
-            except Exception as e:
-                print(f"Error playing song: {e}")
+    def _on_loaded(self, task):
+        # Loads cancelled by skip or stop have already been replaced, so their results are dropped
+        if task is self._loading:
+            self._post("loaded", task)
 
-    async def pause(self):
-        """Pauses the currently playing song."""
+    async def _handle_loaded(self, task):
+        if task is not self._loading:
+            return
+        self._loading = None
+
+        loaded = None
+        if not task.cancelled():
+            if task.exception() is not None:
+                error = task.exception()
+                print(f"Error playing song: {type(error).__name__}: {error}")
+            else:
+                loaded = task.result()
+
+        fading, self._crossfade_from = self._crossfade_from, None
+        if loaded is None:
+            self._load_next()  # Move on to the next song in the queue
+            return
+        source, duration, offset = loaded
+        self._position, self._playing_since = offset, time.monotonic()
+
+        if fading is not None and self.vc.source is fading and not source.is_opus():
+            # The previous song is still playing its last seconds; fade into this one within the same stream
+            fading.attach_next(source, duration)
+            return
+
+        if self._song_ended_at is not None:
+            self.last_transition_gap = time.monotonic() - self._song_ended_at
+            metrics.TRANSITION_GAP.observe(self.last_transition_gap)
+            self._song_ended_at = None
+
+        self._play(source, duration - offset if duration else None)
+
+    def _play(self, source, remaining):
+        """Plays `source`, which has `remaining` seconds left, through the DSP stage unless it is already encoded."""
+        if source.is_opus():
+            # Voice worker sources are already encoded and apply their volume in the worker; cached Opus is copied as is
+            source.volume = self.volume
+        else:
+            source = DSPAudio(source, self.dsp, remaining)
+            source.on_near_end = lambda: self._notify("crossfade", source)
+        self.vc.play(source, after=lambda error: self._after_song(source, error))
+        self.is_playing = True
+
+    async def _handle_crossfade(self, audio):
+        # Start loading the next song early so the DSP stage can mix it in while this one ends
+        if self.vc is None or self.vc.source is not audio or self._loading is not None or self.is_paused or not self.queue:
+            return
+        self._crossfade_from = audio
+        self._load_next()
+
+    async def _handle_song_end(self, source, error):
+        if self.vc is not None and self.vc.source is not None and self.vc.source is not source:
+            return  # Skipped while the next song loaded for a crossfade, which has started playing since
+        self._position, self._playing_since = 0.0, None
+        if error:
+            print(f"Error playing song: {error}")
+        self.is_playing = False
+        self.is_paused = False
+        if self._loading is not None:
+            # The song ended before the next one, loaded for a crossfade, was ready; it starts as soon as it is
+            self._crossfade_from = None
+            self._song_ended_at = time.monotonic()
+            return
+        self._song_ended_at = time.monotonic() if self.queue else None  # Idle time after the queue runs out is not a gap
+        self._load_next()
+
+    async def _handle_pause(self):
         if self.vc and self.vc.is_playing():
             self.vc.pause()
             self.is_playing = False
             self.is_paused = True
+            self._position, self._playing_since = self.position(), None
 
-    async def resume(self):
-        """Resumes playback of the paused song."""
+    async def _handle_resume(self):
         if self.vc and self.is_paused:
             self.vc.resume()
             self.is_playing = True
             self.is_paused = False
+            self._playing_since = time.monotonic()
+            await self._handle_effects()  # Apply effects changed while paused
 
-    async def skip(self):
-        """Skips to the next song in the queue."""
-        if self.vc:
+    async def _handle_skip(self):
+        if self._crossfade_from is not None:
+            # The song is playing its last seconds while the next one loads; that one starts once it is ready
+            self._crossfade_from = None
+            self.vc.stop()
+        elif self._loading is not None:
+            self._loading.cancel()
+            self._loading = None
+            self._load_next()
+        elif self.vc:
+            # Stopping the voice client fires the after callback, which loads the next song
             self.vc.stop()
-            self.is_playing = False
-            self.current_song = None
-            await self.play_next()
 
-    async def stop(self):
-        """Stops playback and clears the queue."""
+    async def _handle_stop(self):
+        self.queue.clear()
+        self._prefetch()
+        if self._loading is not None:
+            self._loading.cancel()
+            self._loading = None
         if self.vc:
             self.vc.stop()
-            self.is_playing = False
-            self.is_paused = False
-            self.current_song = None
-            self.queue = []
             await self.disconnect()
+        self.is_playing = False
+        self.is_paused = False
+        self.current_song = None
+        self._song_ended_at = None
+        self._crossfade_from = None
+        self._seek = None
+        self._position, self._playing_since = 0.0, None
+
+    async def _handle_volume(self, volume):
+        if 0 <= volume <= 1:
+            # The DSP stage ramps to the new volume; nothing is re-wrapped, so repeated changes cost nothing per frame
+            self.volume = self.dsp.volume = volume
+            if self.vc and self.vc.source is not None and self.vc.source.is_opus():
+                self.vc.source.volume = volume
+            await self._handle_effects()
+
+    async def _handle_effects(self):
+        # Copied cache files bypass the DSP stage, so one playing when an effect is turned on is reopened where it is
+        source = self.vc.source if self.vc else None
+        if not isinstance(source, CachedOpusAudio) or self.is_paused or self.dsp.is_passthrough():
+            return
+        position = self.position()
+        track = await self.resolver.resolve(self.voice_channel.guild.id, self.current_song.url)
+        replacement = self._create_source(track, position)
+        # The stopped source's end is ignored once the replacement is playing (see `_handle_song_end`)
+        self.vc.stop()
+        self._position, self._playing_since = position, time.monotonic()
+        self._play(replacement, track['duration'] - position if track['duration'] else None)
+
+    def _create_source(self, track, offset=0):
+        # Popular tracks play from the local Opus cache instead of the network
+        path = self.audio_cache.lookup(track['id']) if self.audio_cache is not None else None
+        if self.voice_workers is not None:
+            guild_id = self.voice_channel.guild.id
+            if path is not None:
+                return self.voice_workers.open(guild_id, path, options=music.FFMPEG_OPTIONS, volume=self.volume, offset=offset)
+            return self.voice_workers.open(guild_id, track['stream_url'], music.FFMPEG_BEFORE_OPTIONS, music.FFMPEG_OPTIONS, self.volume, offset)
+
+        # Restored songs start where they were interrupted
+        seek = f"-ss {offset:.1f}" if offset else ""
+        if path is not None:
+            # FFmpeg reads the file itself; without effects its Opus packets are sent as they are, skipping decoding and encoding
+            if self.dsp.is_passthrough():
+                return CachedOpusAudio(path, before_options=seek or None, options=music.FFMPEG_OPTIONS)
+            return discord.FFmpegPCMAudio(path, before_options=seek or None, options=music.FFMPEG_OPTIONS)
+
+        # FFmpeg decodes the stream incrementally, so memory stays flat whatever the track length
+        before_options = f"{seek} {music.FFMPEG_BEFORE_OPTIONS}".strip()
+        return discord.FFmpegPCMAudio(track['stream_url'], before_options=before_options, options=music.FFMPEG_OPTIONS)
+
+    def _prefetch(self):
+        """Resolves the next few queued songs in the background.
+
+        Work for songs that have left the look-ahead window (because they were
+        skipped, removed, reordered or cleared) is cancelled.
+        """
+        upcoming = [song.url for song in self.queue.peek(music.PREFETCH_COUNT)]
+
+        for url in list(self._prefetch_tasks):
+            if url not in upcoming:
+                self._prefetch_tasks.pop(url).cancel()
+        for url in list(self._prebuffered):
+            if not upcoming or url != upcoming[0]:
+                self._prebuffered.pop(url).cleanup()
+
+        for url in upcoming:
+            if url not in self._prefetch_tasks and url not in self._prebuffered:
+                self._prefetch_tasks[url] = asyncio.create_task(self._prefetch_song(url))
+
+    async def _prefetch_song(self, url):
+        try:
+            track = await self.resolver.resolve(self.voice_channel.guild.id, url)
+
+            # Only the song up next is pre-buffered, so at most one extra FFmpeg process runs per guild
+            if music.PREBUFFER_SECONDS > 0 and track['stream_url'] is not None and self.queue and self.queue[0].url == url:
+                source = self._create_source(track)
+                # Voice worker sources buffer ahead in their worker already, and cached Opus is read from local disk
+                self._prebuffered[url] = source if source.is_opus() else PrebufferedAudio(source, frames=music.PREBUFFER_SECONDS * 50)
+
+        except ExtractorBusy:
+            pass  # The song is resolved when it reaches the head of the queue instead
+
+        except Exception as e:
+            print(f"Error prefetching song: {e}")
+
+        finally:
+            if self._prefetch_tasks.get(url) is asyncio.current_task():
+                del self._prefetch_tasks[url]
+
+    def _notify(self, command, *args):
+        """Delivers a message to the playback loop from the voice thread."""
+        self.vc.loop.call_soon_threadsafe(self._post, command, *args)
+
+    def _after_song(self, source, error):
+        """Called from the voice thread when `source` ends."""
+        self._notify("song_end", source, error)
+
+    async def pause(self):
+        """Pauses the currently playing song."""
+        await self._call("pause")
+
+    async def resume(self):
+        """Resumes playback of the paused song."""
+        await self._call("resume")
+
+    async def skip(self):
+        """Skips to the next song in the queue."""
+        await self._call("skip")
+
+    async def stop(self):
+        """Stops playback and clears the queue."""
+        await self._call("stop")
 
     async def set_volume(self, volume):
         """Sets the volume of the music player."""
-        if self.vc and 0 <= volume <= 1:
-            self.volume = volume
-            self.vc.source = discord.PCMVolumeTransformer(self.vc.source, volume=self.volume)
\ No newline at end of file
+        await self._call("volume", volume)
+
+    async def set_equalizer(self, bass_db, treble_db):
+        """Sets the bass and treble gains, in dB."""
+        self.dsp.set_eq(bass_db, treble_db)
+        self._post("effects")
+
+    async def set_normalize(self, enabled):
+        """Turns loudness normalization on or off."""
+        self.dsp.normalize = enabled
+        self._post("effects")
+
+    async def set_crossfade(self, seconds):
+        """Sets how many seconds consecutive songs overlap; 0 disables crossfading."""
+        self.dsp.crossfade = seconds
+        self._post("effects")
+
+    async def close(self):
+        """Stops playback and shuts down the playback loop."""
+        if self._task is not None and not self._task.done():
+            await self._call("close")
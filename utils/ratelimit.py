@@ -0,0 +1,113 @@
+import time
+from collections import OrderedDict
+
+from discord.ext import commands
+
+from config import music
+from utils import metrics
+
+class RateLimited(commands.CheckFailure):
+    """Raised by the `rate_limited` check when a command is invoked too often.
+
+    Attributes:
+        scope (str): The limit that was hit: "user", "guild" or "global".
+        retry_after (float): Seconds until the command can be used again.
+    """
+
+    def __init__(self, scope, retry_after):
+        super().__init__(f"Rate limited ({scope}), retry in {retry_after:.1f}s")
+        self.scope = scope
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """A bucket of `capacity` tokens refilled at `rate` tokens per second."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def retry_after(self):
+        """Returns how long until a token is available, after `refill`; 0 if one is available now."""
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+class RateLimiter:
+    """Per-user, per-guild and global token buckets for expensive commands.
+
+    A command use takes one token from each of its three buckets, and only
+    if all three have one, so a user who is limited does not drain their
+    guild's or the global budget. Buckets are kept in one LRU of at most
+    `max_buckets` entries; an evicted bucket has been idle the longest and
+    has most likely refilled anyway. A rate of 0 disables a scope.
+
+    Args:
+        user (tuple[float, int]): `(rate, burst)` of each user's bucket.
+        guild (tuple[float, int]): `(rate, burst)` of each guild's bucket.
+        global_ (tuple[float, int]): `(rate, burst)` of the bucket shared by everyone.
+        max_buckets (int): The maximum number of buckets kept.
+    """
+
+    def __init__(self, user, guild, global_, max_buckets):
+        self.limits = {"user": user, "guild": guild, "global": global_}
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()  # (scope, id) -> TokenBucket
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def _bucket(self, scope, key, now):
+        rate, burst = self.limits[scope]
+        if rate <= 0:
+            return None
+        bucket = self._buckets.get((scope, key))
+        if bucket is None:
+            bucket = self._buckets[(scope, key)] = TokenBucket(rate, burst, now)
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end((scope, key))
+            bucket.refill(now)
+        return bucket
+
+    def acquire(self, user_id, guild_id):
+        """Takes a token for a command use.
+
+        Raises:
+            RateLimited: If any of the buckets is empty; no token is taken then.
+        """
+        now = time.monotonic()
+        buckets = [("user", self._bucket("user", user_id, now))]
+        if guild_id is not None:
+            buckets.append(("guild", self._bucket("guild", guild_id, now)))
+        buckets.append(("global", self._bucket("global", None, now)))
+
+        for scope, bucket in buckets:
+            if bucket is not None and bucket.retry_after() > 0:
+                metrics.RATE_LIMITED.inc(scope=scope)
+                raise RateLimited(scope, bucket.retry_after())
+        for _, bucket in buckets:
+            if bucket is not None:
+                bucket.tokens -= 1
+
+def create_rate_limiter():
+    """Returns a `RateLimiter` with the configured limits."""
+    return RateLimiter(
+        (music.RATE_LIMIT_USER_RATE, music.RATE_LIMIT_USER_BURST),
+        (music.RATE_LIMIT_GUILD_RATE, music.RATE_LIMIT_GUILD_BURST),
+        (music.RATE_LIMIT_GLOBAL_RATE, music.RATE_LIMIT_GLOBAL_BURST),
+        music.RATE_LIMIT_MAX_BUCKETS,
+    )
+
+def rate_limited():
+    """A command check that takes a token from the cog's `rate_limiter`, raising `RateLimited` if there is none."""
+    async def predicate(ctx):
+        ctx.cog.rate_limiter.acquire(ctx.author.id, ctx.guild.id if ctx.guild else None)
+        return True
+    return commands.check(predicate)
@@ -0,0 +1,248 @@
+import asyncio
+import time
+from urllib.parse import parse_qs, urlparse
+
+from config import music
+from utils.cache import SQLiteCache, TTLCache, TieredCache
+from utils.singleflight import SingleFlight
+from utils.spotify import SPOTIFY_BATCH_SIZE
+from utils.track_queue import Track
+
+PLAYLIST_PAGE_SIZE = 50  # Entries yielded per page of a YouTube playlist listing
+SPOTIFY_PREVIEW_SECONDS = 30  # Length of the preview clips that Spotify tracks play
+
+def canonical_id(url):
+    """Returns a stable cache key for a YouTube or Spotify track URL.
+
+    Args:
+        url (str): The track URL.
+
+    Returns:
+        str: `youtube:<video id>`, `spotify:track:<track id>`, or the URL itself if it is not recognized.
+    """
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host.endswith("youtu.be"):
+        return f"youtube:{parsed.path.strip('/')}"
+    if host.endswith("youtube.com"):
+        video_id = parse_qs(parsed.query).get("v")
+        if video_id:
+            return f"youtube:{video_id[0]}"
+    if host.endswith("spotify.com") and "/track/" in parsed.path:
+        return f"spotify:track:{parsed.path.rstrip('/').split('/')[-1]}"
+    return url
+
+def playlist_id(url):
+    """Returns the kind and ID of a Spotify playlist/album or YouTube playlist URL.
+
+    Args:
+        url (str): The URL to inspect.
+
+    Returns:
+        tuple[str, str] | None: `("spotify:playlist" | "spotify:album" | "youtube:playlist", id)`, or None if
+        the URL is not a playlist. YouTube watch URLs that merely carry a `list` parameter count as single tracks.
+    """
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    parts = parsed.path.strip("/").split("/")
+    if host.endswith("spotify.com") and len(parts) >= 2 and parts[-2] in ("playlist", "album"):
+        return f"spotify:{parts[-2]}", parts[-1]
+    if host.endswith("youtube.com") and parsed.path.rstrip("/") == "/playlist":
+        list_id = parse_qs(parsed.query).get("list")
+        if list_id:
+            return "youtube:playlist", list_id[0]
+    return None
+
+def stream_url_ttl(stream_url, default_ttl):
+    """Returns how long a resolved stream URL may be cached.
+
+    YouTube stream URLs are signed and carry their expiry in an `expire` query
+    parameter; the cache entry must not outlive it.
+    """
+    expire = parse_qs(urlparse(stream_url).query).get("expire") if stream_url else None
+    if not expire:
+        return default_ttl
+    try:
+        remaining = int(expire[0]) - time.time() - music.STREAM_URL_EXPIRY_MARGIN
+    except ValueError:
+        return default_ttl
+    return max(0, min(default_ttl, remaining))
+
+class TrackResolver:
+    """Resolves track URLs to playable stream URLs, caching the results.
+
+    Resolved tracks are dicts with `id`, `title`, `url` (the page URL),
+    `stream_url` (None if the track has nothing playable) and `duration` keys.
+    `duration` is the length of what `stream_url` plays, so for Spotify
+    tracks it is the length of their preview, not of the song.
+    """
+
+    def __init__(self, extractor, spotify):
+        self.extractor = extractor
+        self.spotify = spotify
+        disk = SQLiteCache(music.RESOLVE_CACHE_PATH, music.RESOLVE_CACHE_DISK_SIZE) if music.RESOLVE_CACHE_PATH else None
+        self.cache = TieredCache(TTLCache(music.RESOLVE_CACHE_SIZE, music.RESOLVE_CACHE_TTL), disk)
+        self._inflight = SingleFlight()
+
+    async def resolve(self, guild_id, url):
+        """Resolves `url`, serving it from the cache when possible.
+
+        Args:
+            guild_id (int): The guild the lookup is made for.
+            url (str): A YouTube or Spotify track URL.
+
+        Returns:
+            dict: The resolved track.
+        """
+        key = canonical_id(url)
+        track = await self.cache.get(key)
+        if track is not None:
+            return track
+
+        # Concurrent lookups of the same track (playback, prefetch, imports) share one resolution
+        return await self._inflight.do(key, self._resolve, guild_id, key, url)
+
+    async def _resolve(self, guild_id, key, url):
+        if key.startswith("spotify:track:"):
+            track_info = await self.spotify.track(key.split(":")[-1])
+            track = self._spotify_track(track_info, url)
+        else:
+            track = await self._resolve_youtube(guild_id, key, url)
+
+        await self._store(key, track)
+        return track
+
+    async def resolve_many(self, guild_id, urls):
+        """Resolves many URLs into the cache, e.g. the entries of an imported playlist.
+
+        Spotify tracks are fetched through the multi-track endpoint, 50 IDs per
+        request. YouTube tracks are extracted concurrently, at most
+        `IMPORT_CONCURRENCY` at a time. Failures are logged and skipped.
+
+        Args:
+            guild_id (int): The guild the lookups are made for.
+            urls (list[str]): YouTube or Spotify track URLs.
+        """
+        spotify_urls = {}
+        youtube_urls = []
+        for url in urls:
+            key = canonical_id(url)
+            if key in self._inflight or await self.cache.get(key) is not None:
+                continue
+            if key.startswith("spotify:track:"):
+                spotify_urls[key.split(":")[-1]] = url
+            else:
+                youtube_urls.append(url)
+
+        track_ids = list(spotify_urls)
+        for start in range(0, len(track_ids), SPOTIFY_BATCH_SIZE):
+            batch = track_ids[start:start + SPOTIFY_BATCH_SIZE]
+            try:
+                results = await self.spotify.tracks(batch)
+            except Exception as e:
+                print(f"Error resolving Spotify tracks: {e}")
+                continue
+            for track_info in results['tracks']:
+                if track_info is not None:
+                    await self._store(f"spotify:track:{track_info['id']}", self._spotify_track(track_info, spotify_urls[track_info['id']]))
+
+        semaphore = asyncio.Semaphore(music.IMPORT_CONCURRENCY)
+
+        async def resolve_one(url):
+            async with semaphore:
+                try:
+                    await self.resolve(guild_id, url)
+                except Exception as e:
+                    print(f"Error resolving {url}: {e}")
+
+        await asyncio.gather(*(resolve_one(url) for url in youtube_urls))
+
+    async def iter_playlist(self, guild_id, url):
+        """Lists the entries of a Spotify playlist/album or YouTube playlist.
+
+        Listings are paged through the batch endpoints and yielded one page at a
+        time as `Track` records, so callers can enqueue (and start playing) the
+        first entries before the whole listing is read. Spotify pages carry
+        everything a resolved track needs, so their entries are cached as they
+        are listed; YouTube entries are left unresolved.
+
+        Args:
+            guild_id (int): The guild the import is made for.
+            url (str): The playlist or album URL.
+
+        Yields:
+            list[Track]: The next page of entries.
+        """
+        kind, list_id = playlist_id(url)
+        remaining = music.MAX_PLAYLIST_SIZE
+
+        if kind == "youtube:playlist":
+            # One flat extraction per window, so the first entries are queued before later continuation pages are fetched
+            start = 1
+            while remaining > 0:
+                end = start + min(PLAYLIST_PAGE_SIZE, remaining) - 1
+                info = await self.extractor.extract(guild_id, url, {'extract_flat': 'in_playlist', 'playliststart': start, 'playlistend': end})
+                window = list(info.get('entries') or [])
+                tracks = [
+                    Track(f"https://www.youtube.com/watch?v={entry['id']}", entry.get('title') or entry['id'], entry.get('duration'))
+                    for entry in window if entry and entry.get('id')
+                ]
+                if tracks:
+                    yield tracks
+                if len(window) < end - start + 1:
+                    return  # The playlist ended within this window
+                remaining -= len(window)
+                start = end + 1
+            return
+
+        offset = 0
+        while remaining > 0:
+            if kind == "spotify:playlist":
+                page = await self.spotify.playlist_items(
+                    list_id, limit=100, offset=offset,
+                    fields="items(track(id,name,duration_ms,preview_url)),next", additional_types=("track",),
+                )
+                items = [item['track'] for item in page['items'] if item.get('track') and item['track'].get('id')]
+            else:
+                page = await self.spotify.album_tracks(list_id, limit=SPOTIFY_BATCH_SIZE, offset=offset)
+                items = page['items']
+
+            tracks = []
+            for item in items[:remaining]:
+                track_url = f"https://open.spotify.com/track/{item['id']}"
+                # No per-track lookup is needed later: the page already has the preview URL
+                await self._store(f"spotify:track:{item['id']}", self._spotify_track(item, track_url))
+                tracks.append(Track(track_url, item['name'], item['duration_ms'] / 1000))
+            if tracks:
+                yield tracks
+            remaining -= len(tracks)
+            offset += len(page['items'])
+            if not page.get('next'):
+                return
+
+    async def _store(self, key, track):
+        ttl = stream_url_ttl(track['stream_url'], music.RESOLVE_CACHE_TTL)
+        if ttl > 0:
+            await self.cache.set(key, track, ttl)
+
+    async def _resolve_youtube(self, guild_id, key, url):
+        info = await self.extractor.extract(guild_id, url, {'format': 'bestaudio'})
+        return {
+            'id': key,
+            'title': info['title'],
+            'url': info.get('webpage_url', url),
+            'stream_url': info['url'],
+            'duration': info.get('duration'),
+        }
+
+    def _spotify_track(self, track_info, url):
+        return {
+            'id': f"spotify:track:{track_info['id']}",
+            'title': track_info['name'],
+            'url': url,
+            'stream_url': track_info['preview_url'],
+            'duration': min(track_info['duration_ms'] / 1000, SPOTIFY_PREVIEW_SECONDS),
+        }
+
+    def close(self):
+        self.cache.close()
@@ -0,0 +1,88 @@
+from config import music
+from utils.cache import TTLCache
+from utils.singleflight import SingleFlight
+from utils.track_queue import Track
+
+def normalize_query(query):
+    """Returns the cache key of a search query: lowercased, with runs of whitespace collapsed."""
+    return " ".join(query.lower().split())
+
+class YouTubeSearch:
+    """Searches YouTube by text, caching the results per normalized query.
+
+    Searches run as flat `ytsearchN:` extractions on the shared `Extractor`,
+    which list the hits without resolving their formats, so a search costs
+    one lightweight extraction however many results it returns. Results are
+    unresolved `Track` records; only the one that gets played is resolved,
+    through `TrackResolver`, when its turn comes.
+
+    Args:
+        extractor (Extractor): The shared extraction worker pool.
+        max_results (int): The number of hits requested per search.
+    """
+
+    def __init__(self, extractor, max_results=music.SEARCH_RESULTS):
+        self.extractor = extractor
+        self.max_results = max_results
+        self.cache = TTLCache(music.SEARCH_CACHE_SIZE, music.SEARCH_CACHE_TTL)
+        self._inflight = SingleFlight()
+
+    async def search(self, guild_id, query):
+        """Returns the results for `query`, best first.
+
+        Args:
+            guild_id (int): The guild the search is made for, used for fair scheduling.
+            query (str): The text to search for.
+
+        Returns:
+            list[Track]: The results; empty if nothing was found.
+
+        Raises:
+            ExtractorBusy: If the extraction backlog is full.
+        """
+        key = normalize_query(query)
+        results = self.cache.get(key)
+        if results is not None:
+            return results
+
+        # Identical searches made at the same time (e.g. `!search` then `!play` of the same text) share one extraction
+        return await self._inflight.do(key, self._search, guild_id, key)
+
+    async def _search(self, guild_id, key):
+        info = await self.extractor.extract(guild_id, f"ytsearch{self.max_results}:{key}", {'extract_flat': True})
+        results = self._rank([entry for entry in info.get('entries') or [] if entry and entry.get('id')])
+        self.cache.set(key, results)
+        return results
+
+    async def lookup(self, guild_id, url):
+        """Lists the video at a YouTube URL, or the first entries of a playlist URL, to pick from.
+
+        Playlists are extracted flat, like searches, so their entries' formats
+        are not resolved. Results are not cached.
+
+        Args:
+            guild_id (int): The guild the lookup is made for, used for fair scheduling.
+            url (str): A YouTube video or playlist URL.
+
+        Returns:
+            list[Track]: At most `max_results` entries, in playlist order; empty if there are none.
+
+        Raises:
+            ExtractorBusy: If the extraction backlog is full.
+        """
+        info = await self.extractor.extract(guild_id, url, {'extract_flat': 'in_playlist', 'playlistend': self.max_results})
+        if 'entries' not in info:
+            return [Track(info.get('webpage_url') or url, info.get('title') or url, info.get('duration'))]
+        return self._tracks([entry for entry in info['entries'] or [] if entry and entry.get('id')][:self.max_results])
+
+    @staticmethod
+    def _tracks(entries):
+        return [
+            Track(f"https://www.youtube.com/watch?v={entry['id']}", entry.get('title') or entry['id'], entry.get('duration'))
+            for entry in entries
+        ]
+
+    @classmethod
+    def _rank(cls, entries):
+        """Keeps YouTube's relevance order, but moves live streams and entries without a duration after regular videos."""
+        return sorted(cls._tracks(entries), key=lambda track: not track.duration)
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+from utils.track_queue import Track
+
+def encode_songs(songs):
+    """Serializes songs as compact `[url, title, duration]` rows."""
+    return json.dumps([[song.url, song.title, song.duration] for song in songs], separators=(",", ":"))
+
+def decode_songs(rows):
+    return [Track(*song) for song in json.loads(rows)]
+
+class SessionStore:
+    """Persists lightweight snapshots of guild queues in a local SQLite file.
+
+    A snapshot is the list of queued songs (current song first), stored as
+    compact `[url, title, duration]` rows so evicted players can be restored
+    without re-resolving anything.
+
+    The store also holds checkpoints of active players (their voice channel,
+    songs, playback position and volume) so they can be resumed after a
+    restart or crash; see `utils.checkpoints`.
+
+    Args:
+        path (str): The SQLite database file.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            # Checkpoints are rewritten every few seconds; the WAL journal keeps each commit to one sequential append
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (guild_id INTEGER PRIMARY KEY, songs TEXT NOT NULL, saved_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints (guild_id INTEGER PRIMARY KEY, channel_id INTEGER NOT NULL, "
+                "songs TEXT NOT NULL, position REAL NOT NULL, volume REAL NOT NULL, saved_at REAL NOT NULL)"
+            )
+
+    async def save(self, guild_id, songs):
+        """Stores the snapshot for a guild, replacing any previous one."""
+        await asyncio.to_thread(self._execute, "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)", (guild_id, encode_songs(songs), time.time()))
+
+    async def pop(self, guild_id):
+        """Removes and returns the snapshot for a guild, or an empty list if there is none."""
+        row = await asyncio.to_thread(self._pop, guild_id)
+        return decode_songs(row[0]) if row else []
+
+    def _pop(self, guild_id):
+        with self._lock, self._db:
+            row = self._db.execute("SELECT songs FROM sessions WHERE guild_id = ?", (guild_id,)).fetchone()
+            self._db.execute("DELETE FROM sessions WHERE guild_id = ?", (guild_id,))
+        return row
+
+    async def save_checkpoints(self, checkpoints, positions, removed):
+        """Writes a batch of checkpoint changes in a single transaction.
+
+        Args:
+            checkpoints (list[tuple]): `(guild_id, channel_id, songs, position, volume)` rows to store in full,
+                with `songs` already encoded by `encode_songs`.
+            positions (list[tuple]): `(guild_id, position, volume)` updates for guilds whose songs are unchanged.
+            removed (list[int]): Guilds whose checkpoints are deleted.
+        """
+        await asyncio.to_thread(self._save_checkpoints, checkpoints, positions, removed, time.time())
+
+    def _save_checkpoints(self, checkpoints, positions, removed, saved_at):
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?)", [(*row, saved_at) for row in checkpoints]
+            )
+            self._db.executemany(
+                "UPDATE checkpoints SET position = ?, volume = ?, saved_at = ? WHERE guild_id = ?",
+                [(position, volume, saved_at, guild_id) for guild_id, position, volume in positions],
+            )
+            self._db.executemany("DELETE FROM checkpoints WHERE guild_id = ?", [(guild_id,) for guild_id in removed])
+
+    async def load_checkpoints(self):
+        """Returns every checkpoint as `(guild_id, channel_id, songs, position, volume)`, oldest first."""
+        rows = await asyncio.to_thread(self._fetch_all, "SELECT guild_id, channel_id, songs, position, volume FROM checkpoints ORDER BY saved_at")
+        return [(guild_id, channel_id, decode_songs(songs), position, volume) for guild_id, channel_id, songs, position, volume in rows]
+
+    def _fetch_all(self, statement):
+        with self._lock:
+            return self._db.execute(statement).fetchall()
+
+    def _execute(self, statement, parameters):
+        with self._lock, self._db:
+            self._db.execute(statement, parameters)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,58 @@
+import math
+from collections.abc import MutableMapping
+
+def shard_id_for(guild_id, shard_count):
+    """Returns the shard a guild belongs to, using Discord's sharding formula."""
+    return (guild_id >> 22) % (shard_count or 1)
+
+class ShardedRegistry(MutableMapping):
+    """A guild ID -> value mapping partitioned by the shard each guild belongs to.
+
+    It behaves like a plain dict keyed by guild ID, and `shard()` exposes one
+    shard's partition, so per-shard work (reporting, or dropping state when
+    a shard goes away) only touches that shard's guilds.
+
+    Args:
+        bot (discord.Client): The bot whose shard count decides the partitions.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._shards = {}  # shard_id -> {guild_id: value}
+
+    def _partition(self, guild_id):
+        return self._shards.setdefault(shard_id_for(guild_id, self.bot.shard_count), {})
+
+    def __getitem__(self, guild_id):
+        return self._partition(guild_id)[guild_id]
+
+    def __setitem__(self, guild_id, value):
+        self._partition(guild_id)[guild_id] = value
+
+    def __delitem__(self, guild_id):
+        del self._partition(guild_id)[guild_id]
+
+    def __iter__(self):
+        for partition in list(self._shards.values()):
+            yield from list(partition)
+
+    def __len__(self):
+        return sum(len(partition) for partition in self._shards.values())
+
+    def shard(self, shard_id):
+        """Returns the `{guild_id: value}` partition of one shard."""
+        return self._shards.get(shard_id, {})
+
+def shard_health(bot):
+    """Returns `(shard_id, latency_ms, guilds, healthy)` for each shard run by this process."""
+    guilds = {}
+    for guild in bot.guilds:
+        guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+
+    shards = getattr(bot, "shards", None) or {0: None}
+    health = []
+    for shard_id, shard in sorted(shards.items()):
+        latency = shard.latency if shard is not None else bot.latency
+        healthy = not math.isnan(latency) and not math.isinf(latency) and (shard is None or not shard.is_closed())
+        health.append((shard_id, round(latency * 1000) if healthy else None, guilds.get(shard_id, 0), healthy))
+    return health
@@ -0,0 +1,31 @@
+import asyncio
+
+class SingleFlight:
+    """Collapses concurrent calls that share a key into a single execution.
+
+    The first caller for a key starts the work; callers arriving while it is in
+    flight await the same result instead of repeating it.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    def __contains__(self, key):
+        return key in self._calls
+
+    async def do(self, key, func, *args, **kwargs):
+        """Awaits `func(*args, **kwargs)`, sharing the call with any in-flight one for `key`."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda task: self._forget(key, task))
+
+        # Shielded so that one cancelled caller does not cancel the work for the others
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # Mark the exception as retrieved when every caller has gone away
@@ -0,0 +1,170 @@
+import asyncio
+import importlib
+import re
+import threading
+import time
+
+from config import music, secrets
+from utils.singleflight import SingleFlight
+
+SPOTIFY_BATCH_SIZE = 50  # Maximum IDs accepted by the multi-track endpoint
+SPOTIFY_ID = re.compile(r"[0-9A-Za-z]{22}")  # Spotify IDs are 22 base62 characters
+
+spotipy = None  # Imported on first use by import_spotipy(), as it is slow to import
+
+def import_spotipy():
+    """Imports spotipy if it is not imported yet, and returns it."""
+    global spotipy
+    if spotipy is None:
+        module = importlib.import_module("spotipy")
+        importlib.import_module("spotipy.cache_handler")
+        importlib.import_module("spotipy.oauth2")
+        spotipy = module
+    return spotipy
+
+class SpotifyGateway:
+    """The process-wide, asyncio-friendly entry point to the Spotify Web API.
+
+    A single spotipy client is shared, so the client-credentials token is
+    negotiated once and reused until it expires. Requests run on worker
+    threads. A 429 response pauses every request until its `Retry-After`
+    delay has passed. Identical in-flight requests are coalesced, and
+    concurrent `track` lookups are batched into the multi-track endpoint.
+    The client is created by the first request, on a worker thread.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._inflight = SingleFlight()
+        self._blocked_until = 0
+        self._pending_tracks = {}  # track id -> futures waiting for the next batch
+        self._flush_handle = None
+        self._batches = set()  # Strong references to running batch lookups
+
+    @property
+    def client(self):
+        """The shared spotipy client, created on first use."""
+        with self._client_lock:
+            if self._client is None:
+                spotipy = import_spotipy()
+                auth_manager = spotipy.oauth2.SpotifyClientCredentials(
+                    client_id=secrets.SPOTIFY_CLIENT_ID,
+                    client_secret=secrets.SPOTIFY_CLIENT_SECRET,
+                    cache_handler=spotipy.cache_handler.MemoryCacheHandler(),
+                )
+                self._client = spotipy.Spotify(auth_manager=auth_manager, requests_session=self._session())
+            return self._client
+
+    @staticmethod
+    def _session():
+        """Returns an HTTP session that retries server errors but never 429.
+
+        urllib3 retries a 429 on its own, sleeping out its Retry-After on the
+        worker thread, unless told not to respect the header. Here a 429 must
+        surface at once, so that `_call` pauses every request, not just one.
+        """
+        import requests
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=3, connect=None, read=False, status=3, backoff_factor=0.3,
+            allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE"]),
+            status_forcelist=(500, 502, 503, 504), respect_retry_after_header=False,
+        )
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    async def track(self, track_id):
+        """Returns a track object. Concurrent calls are batched into one `tracks` request."""
+        if not SPOTIFY_ID.fullmatch(track_id):
+            # Kept out of the batch, where Spotify would reject every other guild's IDs along with it
+            raise import_spotipy().SpotifyException(400, -1, f"Invalid Spotify track ID {track_id!r}")
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending_tracks.setdefault(track_id, []).append(future)
+
+        if len(self._pending_tracks) >= SPOTIFY_BATCH_SIZE:
+            self._flush_tracks()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(music.SPOTIFY_BATCH_WINDOW, self._flush_tracks)
+
+        track_info = await future
+        if track_info is None:
+            raise import_spotipy().SpotifyException(404, -1, f"Track {track_id} not found")
+        return track_info
+
+    async def tracks(self, track_ids):
+        """Returns the track objects for up to 50 IDs (None for unknown IDs)."""
+        return await self._request("tracks", list(track_ids))
+
+    async def playlist_items(self, playlist_id, **kwargs):
+        return await self._request("playlist_items", playlist_id, **kwargs)
+
+    async def album_tracks(self, album_id, **kwargs):
+        return await self._request("album_tracks", album_id, **kwargs)
+
+    async def search(self, **kwargs):
+        return await self._request("search", **kwargs)
+
+    def _flush_tracks(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending, self._pending_tracks = self._pending_tracks, {}
+        track_ids = list(pending)
+        for start in range(0, len(track_ids), SPOTIFY_BATCH_SIZE):
+            batch = {track_id: pending[track_id] for track_id in track_ids[start:start + SPOTIFY_BATCH_SIZE]}
+            task = asyncio.create_task(self._resolve_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _resolve_batch(self, batch):
+        try:
+            results = await self.tracks(batch)
+        except Exception as e:
+            if len(batch) > 1 and getattr(e, "http_status", None) in (400, 404):
+                # The request was rejected as a whole; look the IDs up one by one so that only the bad one fails
+                await asyncio.gather(*(self._resolve_batch({track_id: futures}) for track_id, futures in batch.items()))
+                return
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for track_id, track_info in zip(batch, results['tracks']):
+            for future in batch[track_id]:
+                if not future.done():
+                    future.set_result(track_info)
+
+    async def _request(self, method, *args, **kwargs):
+        """Runs a spotipy call off the event loop, sharing it with identical in-flight calls."""
+        key = (method, repr(args), repr(sorted(kwargs.items())))
+        return await self._inflight.do(key, self._call, method, *args, **kwargs)
+
+    def _invoke(self, method, *args, **kwargs):
+        return getattr(self.client, method)(*args, **kwargs)
+
+    async def _call(self, method, *args, **kwargs):
+        for attempt in range(music.SPOTIFY_MAX_RETRIES + 1):
+            delay = self._blocked_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                return await asyncio.to_thread(self._invoke, method, *args, **kwargs)
+            except Exception as e:
+                # Only spotipy.SpotifyException carries an HTTP status
+                if getattr(e, "http_status", None) != 429 or attempt == music.SPOTIFY_MAX_RETRIES:
+                    raise
+                retry_after = float((e.headers or {}).get("Retry-After", 1))
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
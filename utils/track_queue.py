@@ -0,0 +1,100 @@
+import random
+from collections import deque
+from itertools import islice
+
+class Track:
+    """A queued song."""
+
+    __slots__ = ("url", "title", "duration")
+
+    def __init__(self, url, title, duration=None):
+        self.url = url
+        self.title = title
+        self.duration = duration
+
+    def __repr__(self):
+        return f"Track(url={self.url!r}, title={self.title!r})"
+
+class TrackQueue:
+    """A FIFO of `Track` records backed by a deque.
+
+    Enqueueing, dequeueing and `len()` are O(1). Indexed access, removal and
+    moves cost O(min(i, n - i)), so operations near either end of a large
+    queue stay cheap. `version` changes whenever the queue does, so callers
+    can tell whether it needs to be serialized again.
+    """
+
+    def __init__(self, tracks=()):
+        self._tracks = deque(tracks)
+        self.version = 0
+
+    def __len__(self):
+        return len(self._tracks)
+
+    def __bool__(self):
+        return bool(self._tracks)
+
+    def __iter__(self):
+        return iter(self._tracks)
+
+    def __getitem__(self, index):
+        return self._tracks[index]
+
+    def append(self, track):
+        """Adds a track to the end of the queue."""
+        self._tracks.append(track)
+        self.version += 1
+
+    def extend(self, tracks):
+        """Adds many tracks (e.g. a whole playlist) to the end of the queue."""
+        self._tracks.extend(tracks)
+        self.version += 1
+
+    def popleft(self):
+        """Removes and returns the track at the head of the queue."""
+        self.version += 1
+        return self._tracks.popleft()
+
+    def peek(self, count):
+        """Returns the first `count` tracks without removing them."""
+        return list(islice(self._tracks, count))
+
+    def remove(self, index):
+        """Removes and returns the track at `index`."""
+        track = self._tracks[index]
+        del self._tracks[index]
+        self.version += 1
+        return track
+
+    def move(self, source, destination):
+        """Moves the track at `source` so that it ends up at `destination`."""
+        track = self.remove(source)
+        self._tracks.insert(destination, track)
+        self.version += 1
+        return track
+
+    def shuffle(self):
+        """Shuffles the queue in place."""
+        tracks = list(self._tracks)
+        random.shuffle(tracks)
+        self._tracks = deque(tracks)
+        self.version += 1
+
+    def clear(self):
+        self._tracks.clear()
+        self.version += 1
+
+    def page(self, page, per_page):
+        """Returns one page of the queue.
+
+        Args:
+            page (int): The 1-based page number; clamped to the available pages.
+            per_page (int): The number of tracks per page.
+
+        Returns:
+            tuple[list[Track], int, int]: The tracks on the page, the page number and the total number of pages.
+        """
+        pages = max(1, -(-len(self._tracks) // per_page))
+        page = min(max(page, 1), pages)
+        start = (page - 1) * per_page
+        return list(islice(self._tracks, start, start + per_page)), page, pages
@@ -0,0 +1,142 @@
+from abc import ABC, abstractmethod
+
+import discord
+
+from config import bot as bot_config, music
+from utils.helpers import create_embed
+
+HELP_PAGE_SIZE = 10  # Commands per help page; an embed holds at most 25 fields
+
+class HelpPages:
+    """The help embeds, built once and reused until the set of commands changes.
+
+    Loading, unloading or reloading a cog changes the loaded cog objects or
+    the number of commands, which is all that is compared on each request,
+    so serving the help costs no embed building at all in between.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._signature = None
+        self._pages = []
+
+    def pages(self):
+        """Returns the help embeds, one per page."""
+        signature = (len(self.bot.all_commands), tuple(id(cog) for cog in self.bot.cogs.values()))
+        if signature != self._signature:
+            self._pages = self._build()
+            self._signature = signature
+        return self._pages
+
+    def _build(self):
+        commands = sorted((command for command in self.bot.walk_commands() if not command.hidden), key=lambda command: command.qualified_name)
+        chunks = [commands[start:start + HELP_PAGE_SIZE] for start in range(0, len(commands), HELP_PAGE_SIZE)] or [[]]
+
+        pages = []
+        for number, chunk in enumerate(chunks, 1):
+            embed = create_embed(title="Help", description="Here are the available commands:", fields=[
+                {"name": f"{bot_config.COMMAND_PREFIX}{command.qualified_name}", "value": command.help or "No description."}
+                for command in chunk
+            ])
+            embed.set_footer(text=f"Page {number}/{len(chunks)}")
+            pages.append(embed)
+        return pages
+
+class PaginatedView(discord.ui.View, ABC):
+    """Previous/next buttons that flip through pages by editing the message in place.
+
+    Only the member who ran the command can turn the pages. Once the view
+    times out its buttons are removed. Subclasses implement `render`.
+
+    Args:
+        author (discord.abc.User): The member who ran the command.
+        page (int): The 1-based page shown first.
+    """
+
+    def __init__(self, author, page=1):
+        super().__init__(timeout=music.VIEW_TIMEOUT)
+        self.author = author
+        self.page = page
+        self.message = None  # Set by the caller once the message is sent
+
+    @abstractmethod
+    def render(self):
+        """Returns the embed of the current page and the number of pages, clamping `page` to the available pages."""
+
+    def _update_buttons(self, pages):
+        self.previous_page.disabled = self.page <= 1
+        self.next_page.disabled = self.page >= pages
+
+    async def send(self, ctx):
+        """Sends the first page; the buttons are only attached if there is more than one page."""
+        embed, pages = self.render()
+        if pages <= 1:
+            await ctx.send(embed=embed)
+            self.stop()
+            return
+        self._update_buttons(pages)
+        self.message = await ctx.send(embed=embed, view=self)
+
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.author.id:
+            await interaction.response.send_message("Only the member who ran this command can turn its pages.", ephemeral=True)
+            return False
+        return True
+
+    async def _show(self, interaction, page):
+        self.page = page
+        embed, pages = self.render()
+        self._update_buttons(pages)
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction, button):
+        await self._show(interaction, self.page - 1)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction, button):
+        await self._show(interaction, self.page + 1)
+
+    async def on_timeout(self):
+        if self.message is not None:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass  # The message was deleted
+
+class HelpView(PaginatedView):
+    """Pages through the cached help embeds."""
+
+    def __init__(self, author, help_pages):
+        super().__init__(author)
+        self.help_pages = help_pages
+
+    def render(self):
+        pages = self.help_pages.pages()
+        self.page = min(max(self.page, 1), len(pages))
+        return pages[self.page - 1], len(pages)
+
+class QueueView(PaginatedView):
+    """Pages through a guild's queue, formatting only the page on screen.
+
+    Each page is rendered from the live queue when it is shown, so paging
+    after songs were added or played shows the queue as it is now.
+    """
+
+    def __init__(self, author, music_player, page=1):
+        super().__init__(author, page)
+        self.music_player = music_player
+
+    def render(self):
+        queue = self.music_player.queue
+        now_playing = self.music_player.current_song.title if self.music_player.current_song else "Nothing"
+        if len(queue) == 0:
+            return create_embed(title="Queue", description=f"**Now Playing:** {now_playing}\n\nThe queue is empty."), 1
+
+        songs, self.page, pages = queue.page(self.page, music.QUEUE_PAGE_SIZE)
+        start = (self.page - 1) * music.QUEUE_PAGE_SIZE
+        up_next = "\n".join(f"{start + i + 1}. {song.title}" for i, song in enumerate(songs))
+
+        embed = create_embed(title="Queue", description=f"**Now Playing:** {now_playing}\n\n**Up Next:**\n{up_next}")
+        embed.set_footer(text=f"Page {self.page}/{pages} - {len(queue)} songs")
+        return embed, pages
@@ -0,0 +1,354 @@
+import itertools
+import multiprocessing
+import shlex
+import subprocess
+import threading
+import time
+from collections import deque
+
+import discord
+import numpy as np
+
+from config import music
+
+FRAME_SIZE = 3840  # Bytes of 16-bit 48 kHz stereo PCM per 20 ms frame
+FRAME_SECONDS = 0.02
+PACKET_BATCH = 10  # Opus packets sent per message, and credit granted back per message
+
+class VoiceWorkerPool:
+    """Runs audio decoding, volume and Opus encoding for every guild in a pool of worker processes.
+
+    The gateway process keeps the voice connections and only forwards ready
+    Opus packets, so encoding scales across cores instead of sharing the
+    event loop's process. Each guild sticks to one worker (its current and
+    next song share it), new guilds go to the least loaded worker, and when
+    a worker dies its guilds are moved to the others and their streams
+    resume from the last packet received.
+
+    Args:
+        size (int): The number of worker processes.
+    """
+
+    def __init__(self, size):
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._closed = False
+        self._assignments = {}  # guild_id -> worker
+        self._workers = [self._spawn() for _ in range(size)]
+
+    def _spawn(self):
+        conn, child = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child,), name="voice-worker", daemon=True)
+        process.start()
+        child.close()
+
+        worker = _Worker(process, conn)
+        worker.reader = threading.Thread(target=self._read, args=(worker,), name="voice-worker-reader", daemon=True)
+        worker.reader.start()
+        return worker
+
+    def _read(self, worker):
+        """Routes a worker's messages to its streams. Runs on a dedicated thread."""
+        while True:
+            try:
+                message = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+
+            kind, stream_id = message[0], message[1]
+            if kind == "packets":
+                source = worker.streams.get(stream_id)
+                if source is not None:
+                    source._feed(message[2])
+            elif kind == "end":
+                source = worker.streams.pop(stream_id, None)
+                if source is not None:
+                    source._finish(message[2])
+            elif kind == "load":
+                worker.cpu = message[2]
+
+        self._fail_over(worker)
+
+    def _fail_over(self, worker):
+        """Replaces a dead worker and resumes its streams on the remaining workers."""
+        with self._lock:
+            if self._closed or worker not in self._workers:
+                return
+            print(f"Voice worker {worker.process.pid} exited; moving {len(worker.streams)} streams")
+            self._workers[self._workers.index(worker)] = self._spawn()
+            for guild_id in [guild_id for guild_id, assigned in self._assignments.items() if assigned is worker]:
+                del self._assignments[guild_id]
+
+        for source in list(worker.streams.values()):
+            try:
+                self._start(source, self.worker_for(source.guild_id))
+            except Exception as e:
+                source._finish(f"failover failed: {e}")
+
+    def worker_for(self, guild_id):
+        """Returns the worker a guild is assigned to, assigning the least loaded one if needed."""
+        with self._lock:
+            worker = self._assignments.get(guild_id)
+            if worker is None or not worker.process.is_alive():
+                worker = min(self._workers, key=lambda w: (len(w.streams), w.cpu))
+                self._assignments[guild_id] = worker
+            return worker
+
+    def release(self, guild_id):
+        """Forgets a guild's worker assignment, e.g. when its player is evicted."""
+        with self._lock:
+            self._assignments.pop(guild_id, None)
+
+    def open(self, guild_id, source, before_options="", options="", volume=1.0, offset=0):
+        """Starts decoding `source` (a URL or file path) on the guild's worker, `offset` seconds in.
+
+        Returns:
+            WorkerAudioSource: An Opus audio source fed by the worker.
+        """
+        audio = WorkerAudioSource(self, guild_id, source, before_options, options, volume, offset)
+        self._start(audio, self.worker_for(guild_id))
+        return audio
+
+    def _start(self, audio, worker):
+        # Resumed streams seek past the packets already received and only ask for the rest of the buffer
+        before_options = audio.before_options
+        start = audio.offset + audio.received * FRAME_SECONDS
+        if start:
+            before_options = f"{before_options} -ss {start:.2f}"
+
+        with audio._ready:
+            audio.worker = worker
+            credits = max(music.VOICE_WORKER_BUFFER - len(audio._packets), PACKET_BATCH)
+        worker.streams[audio.id] = audio
+        worker.send(("open", audio.id, audio.source, before_options, audio.options, audio.volume, credits))
+
+    def stats(self):
+        """Returns `(pid, streams, cpu)` for each worker, as last reported."""
+        return [(worker.process.pid, len(worker.streams), worker.cpu) for worker in self._workers]
+
+    def close(self):
+        """Stops every worker process."""
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers)
+        for worker in workers:
+            try:
+                worker.send(("shutdown", None))
+            except (OSError, ValueError):
+                pass
+            worker.process.join(timeout=1)
+            if worker.process.is_alive():
+                worker.process.kill()
+            for source in list(worker.streams.values()):
+                source._finish("voice workers shut down")
+
+class _Worker:
+    """The gateway's handle on one worker process."""
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.reader = None
+        self.streams = {}  # stream id -> WorkerAudioSource
+        self.cpu = 0.0  # Share of one core used, as last reported
+        self._send_lock = threading.Lock()
+
+    def send(self, message):
+        with self._send_lock:
+            self.conn.send(message)
+
+class WorkerAudioSource(discord.AudioSource):
+    """An Opus audio source played from packets encoded in a voice worker process.
+
+    The worker only encodes as far ahead as it has been granted credit for;
+    credit is returned as the voice client consumes packets, so each stream
+    buffers at most `VOICE_WORKER_BUFFER` packets (20 ms each) in the gateway.
+    """
+
+    _ids = itertools.count()
+
+    def __init__(self, pool, guild_id, source, before_options, options, volume, offset=0):
+        self.id = next(self._ids)
+        self.pool = pool
+        self.guild_id = guild_id
+        self.source = source
+        self.before_options = before_options
+        self.options = options
+        self.offset = offset
+        self.worker = None
+        self.received = 0
+        self.error = None
+        self._volume = volume
+        self._packets = deque()
+        self._ready = threading.Condition()
+        self._ended = False
+        self._consumed = 0  # Packets read since credit was last returned
+
+    @property
+    def volume(self):
+        return self._volume
+
+    @volume.setter
+    def volume(self, value):
+        self._volume = value
+        self._send(("volume", self.id, value))
+
+    def _send(self, message):
+        try:
+            self.worker.send(message)
+        except (OSError, ValueError):
+            pass  # The worker died; failover restarts the stream
+
+    def _feed(self, packets):
+        with self._ready:
+            self._packets.extend(packets)
+            self.received += len(packets)
+            self._ready.notify()
+
+    def _finish(self, error):
+        with self._ready:
+            self.error = error
+            self._ended = True
+            self._ready.notify()
+
+    def read(self):
+        with self._ready:
+            if not self._ready.wait_for(lambda: self._packets or self._ended, timeout=music.VOICE_WORKER_READ_TIMEOUT):
+                print(f"Voice worker stream {self.id} stalled")
+                return b""
+            if not self._packets:
+                if self.error:
+                    print(f"Error in voice worker stream: {self.error}")
+                return b""
+            packet = self._packets.popleft()
+            self._consumed += 1
+            grant = self._consumed >= PACKET_BATCH and not self._ended
+            if grant:
+                self._consumed = 0
+
+        if grant:
+            self._send(("credit", self.id, PACKET_BATCH))
+        return packet
+
+    def is_opus(self):
+        return True
+
+    def cleanup(self):
+        with self._ready:
+            self._ended = True
+            self._packets.clear()
+        if self.worker is not None and self.worker.streams.pop(self.id, None) is not None:
+            self._send(("close", self.id))
+
+def _worker_main(conn):
+    """The entry point of a worker process: serves streams until the gateway shuts it down."""
+    send_lock = threading.Lock()
+    streams = {}
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    last_report, last_cpu = time.monotonic(), time.process_time()
+    while True:
+        try:
+            if conn.poll(music.VOICE_WORKER_LOAD_INTERVAL):
+                message = conn.recv()
+                kind, stream_id = message[0], message[1]
+                if kind == "open":
+                    streams[stream_id] = _WorkerStream(stream_id, *message[2:], send=send, streams=streams)
+                elif kind == "credit" and stream_id in streams:
+                    streams[stream_id].credits.release(message[2])
+                elif kind == "volume" and stream_id in streams:
+                    streams[stream_id].volume = message[2]
+                elif kind == "close" and stream_id in streams:
+                    streams.pop(stream_id).stop()
+                elif kind == "shutdown":
+                    break
+
+            now = time.monotonic()
+            if now - last_report >= music.VOICE_WORKER_LOAD_INTERVAL:
+                cpu = time.process_time()
+                send(("load", len(streams), (cpu - last_cpu) / (now - last_report)))
+                last_report, last_cpu = now, cpu
+
+        except (EOFError, OSError):
+            break  # The gateway process is gone
+
+    for stream in list(streams.values()):
+        stream.stop()
+
+class _WorkerStream:
+    """Decodes one source with FFmpeg, applies volume and encodes it to Opus, inside a worker process."""
+
+    def __init__(self, stream_id, source, before_options, options, volume, credits, send, streams):
+        self.id = stream_id
+        self.volume = volume
+        self.credits = threading.Semaphore(credits)
+        self._send = send
+        self._streams = streams
+        self._stopped = False
+        self._process = subprocess.Popen(
+            ["ffmpeg", "-nostdin", "-loglevel", "error", *shlex.split(before_options), "-i", source,
+             *shlex.split(options), "-f", "s16le", "-ar", "48000", "-ac", "2", "pipe:1"],
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        self._thread = threading.Thread(target=self._run, name=f"voice-stream-{stream_id}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        error = None
+        batch = []
+        try:
+            encoder = discord.opus.Encoder()
+            scaled = np.empty(FRAME_SIZE // 2, dtype=np.float32)
+            samples = np.empty(FRAME_SIZE // 2, dtype=np.int16)
+            while not self._stopped:
+                pcm = self._process.stdout.read(FRAME_SIZE)
+                if len(pcm) < FRAME_SIZE:
+                    break
+
+                # Flush what is ready before waiting for the gateway to grant more credit
+                if not self.credits.acquire(blocking=False):
+                    if batch:
+                        self._send(("packets", self.id, batch))
+                        batch = []
+                    self.credits.acquire()
+                    if self._stopped:
+                        break
+
+                if self.volume != 1.0:
+                    np.multiply(np.frombuffer(pcm, dtype=np.int16), min(self.volume, 2.0), out=scaled)
+                    np.clip(scaled, -32768, 32767, out=scaled)
+                    np.copyto(samples, scaled, casting="unsafe")
+                    pcm = samples.tobytes()
+                batch.append(encoder.encode(pcm, encoder.SAMPLES_PER_FRAME))
+                if len(batch) >= PACKET_BATCH:
+                    self._send(("packets", self.id, batch))
+                    batch = []
+
+            if batch and not self._stopped:
+                self._send(("packets", self.id, batch))
+            if self._process.wait() not in (0, None) and not self._stopped:
+                error = self._process.stderr.read().decode(errors="replace").strip() or f"ffmpeg exited with {self._process.returncode}"
+
+        except Exception as e:
+            error = str(e) or type(e).__name__
+
+        finally:
+            self._kill()
+            if not self._stopped:
+                self._streams.pop(self.id, None)
+                try:
+                    self._send(("end", self.id, error))
+                except (OSError, ValueError):
+                    pass
+
+    def stop(self):
+        self._stopped = True
+        self.credits.release()  # Wakes the stream if it is waiting for credit
+        self._kill()
+
+    def _kill(self):
+        if self._process.poll() is None:
+            self._process.kill()
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+class LoopWatchdog:
+    """Detects event loop stalls and reports what was running when they happened.
+
+    A callback scheduled on the loop records a heartbeat every `interval`
+    seconds; a separate thread checks the heartbeat and, once it is more than
+    `threshold` seconds old, prints the loop thread's stack together with the
+    task that was running and, if it is a command, the command and guild.
+
+    Args:
+        loop (asyncio.AbstractEventLoop): The loop to watch.
+        threshold (float): Seconds without a heartbeat before a stall is reported.
+        interval (float): Seconds between heartbeats and checks.
+    """
+
+    def __init__(self, loop, threshold, interval=0.1):
+        self.loop = loop
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls = 0
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id = None
+        self._commands = {}  # task -> (command name, guild ID) of commands being invoked
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+
+    def start(self):
+        """Starts watching. Must be called from the loop's thread."""
+        self._loop_thread_id = threading.get_ident()
+        self._beat()
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def track_commands(self, bot):
+        """Registers invoke hooks so stalls inside commands are reported with the command and guild."""
+        @bot.before_invoke
+        async def before_invoke(ctx):
+            self._commands[asyncio.current_task()] = (ctx.command.qualified_name, ctx.guild.id if ctx.guild else None)
+
+        @bot.after_invoke
+        async def after_invoke(ctx):
+            self._commands.pop(asyncio.current_task(), None)
+
+    def _beat(self):
+        self._heartbeat = time.monotonic()
+        if not self._stopped.is_set():
+            self.loop.call_later(self.interval, self._beat)
+
+    def _watch(self):
+        reported = None
+        while not self._stopped.wait(self.interval):
+            heartbeat = self._heartbeat
+            stalled_for = time.monotonic() - heartbeat
+            if stalled_for >= self.threshold and reported != heartbeat:
+                reported = heartbeat  # One report per stall
+                self.stalls += 1
+                self._report(stalled_for)
+
+    def _report(self, stalled_for):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "  (stack unavailable)\n"
+
+        # Read without locking: the loop thread is stuck, and a stale value only makes the report less precise
+        task = getattr(asyncio.tasks, "_current_tasks", {}).get(self.loop)
+        context = f"task {task.get_name()!r}" if task is not None else "a loop callback outside any task"
+        command = self._commands.get(task)
+        if command is not None:
+            context += f", command !{command[0]} in guild {command[1]}"
+
+        print(f"Event loop stalled for {stalled_for:.2f}s in {context}:\n{stack}", end="")
+
+class SamplingProfiler:
+    """Samples the event loop thread's stack and writes flamegraph-compatible folded stacks.
+
+    Every `dump_interval` seconds the samples collected since the previous
+    dump are written to `<directory>/stacks-<timestamp>.folded`, one
+    `frame;frame;frame count` line per distinct stack, ready for
+    `flamegraph.pl` or speedscope.
+
+    Args:
+        directory (str): Where the folded stack files are written.
+        interval (float): Seconds between samples.
+        dump_interval (float): Seconds between dumps.
+    """
+
+    def __init__(self, directory, interval=0.01, dump_interval=60):
+        self.directory = directory
+        self.interval = interval
+        self.dump_interval = dump_interval
+        self._thread_id = None
+        self._samples = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+
+    def start(self):
+        """Starts sampling the calling thread (the event loop's thread)."""
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread_id = threading.get_ident()
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _sample(self):
+        next_dump = time.monotonic() + self.dump_interval
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self._samples[self._fold(frame)] += 1
+
+            if time.monotonic() >= next_dump:
+                next_dump += self.dump_interval
+                self._dump()
+        self._dump()
+
+    @staticmethod
+    def _fold(frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def _dump(self):
+        samples, self._samples = self._samples, Counter()
+        if not samples:
+            return
+        path = os.path.join(self.directory, f"stacks-{time.strftime('%Y%m%d-%H%M%S')}.folded")
+        try:
+            with open(path, "w") as file:
+                for stack, count in samples.most_common():
+                    file.write(f"{stack} {count}\n")
+        except OSError as e:
+            print(f"Error writing profile samples: {e}")